@@ -3,6 +3,7 @@ import pickle
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.preprocessing import StandardScaler
+from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.svm import SVC
@@ -14,11 +15,11 @@ from xgboost import XGBClassifier
 
 # from imblearn.over_sampling import SMOTE
 
-# Load dataset
-df = pd.read_csv("C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\session_features_30s.csv")
+# Load dataset (Parquet written by create_session.py)
+df = pd.read_parquet("C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\session_features_30s.parquet")
 
-# Binary label: 1 = Stressed, 0 = Not Stressed
-df['stress_binary'] = df['stress_label'].apply(lambda x: 1 if 'Stressed' in x else 0)
+# Binary label: 1 = Stressed, 0 = Not Stressed (vectorized, no per-row lambda)
+df['stress_binary'] = df['stress_label'].str.contains('Stressed', regex=False).astype('int8')
 
 # Feature selection
 feature_columns = [
@@ -26,7 +27,7 @@ feature_columns = [
     'avg_mouse_speed', 'mouse_move_count', 'mouse_click_count',
     'hour', 'day_of_week', 'daylight_morning', 'daylight_evening', 'session_active'
 ]
-X = df[feature_columns]
+X = df[feature_columns].astype('float32')  # RF/XGB train on float32 natively
 y = df['stress_binary']
 
 # Train-test split
@@ -39,39 +40,24 @@ X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_
 # X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
 
 # ----------------------------
-# Scale data for models that require it
+# Scaling for SVM/KNN/LogReg happens inside a Pipeline, so each model
+# scales once during fit/predict — no separate scaled copies of the data
 # ----------------------------
-# scaler = StandardScaler()
-# X_train_scaled = scaler.fit_transform(X_train_resampled)
-# X_test_scaled = scaler.transform(X_test)
-
-# Scaling for SVM and KNN
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# Models to compare
 models = {
-    "Logistic Regression": LogisticRegression(),
-    "SVM": SVC(probability=True),
-    "KNN": KNeighborsClassifier(n_neighbors=3),
-    "Random Forest": RandomForestClassifier(random_state=42),
-    "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
+    "Logistic Regression": Pipeline([('scaler', StandardScaler()), ('model', LogisticRegression(n_jobs=-1))]),
+    "SVM": Pipeline([('scaler', StandardScaler()), ('model', SVC(probability=True))]),
+    "KNN": Pipeline([('scaler', StandardScaler()), ('model', KNeighborsClassifier(n_neighbors=3, n_jobs=-1))]),
+    "Random Forest": RandomForestClassifier(random_state=42, n_jobs=-1),
+    "XGBoost": XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42, tree_method='hist', n_jobs=-1)
 }
 
 # Train and evaluate each model
 results = {}
 for name, model in models.items():
     print(f"\n==== {name} ====")
-    if name in ["SVM", "KNN", "Logistic Regression"]:
-        model.fit(X_train_scaled, y_train)
-        # model.fit(X_train_scaled, y_train_resampled)
-        y_pred = model.predict(X_test_scaled)
-    else:
-        model.fit(X_train, y_train)
-        # model.fit(X_train_resampled, y_train_resampled)
-        y_pred = model.predict(X_test)
-    
+    model.fit(X_train, y_train)
+    y_pred = model.predict(X_test)
+
     # if name == "Random Forest":
     #     # Save the model
     #     with open("rf_model_30s.pkl", "wb") as f:
@@ -449,27 +449,21 @@ def tta_evaluate(model, loader, num_augmentations=5):
 
             # If TTA is enabled, apply multiple augmentations and average results
             if num_augmentations > 1:
-                # Process each image in the batch separately for TTA
-                all_outputs = [outputs_orig]
-
-                # Process original images through the PIL pipeline for augmentations
+                # Build every augmented copy first, then classify them all in
+                # ONE forward pass: concatenate the K batches into (K*B, ...)
+                # and mean over the augmentation axis afterwards, instead of
+                # launching the model K separate times per batch.
                 batch_pil = [transforms.ToPILImage()(img) for img in inputs.cpu()]
-
-                # Apply each TTA transform
-                for transform in tta_transforms[1:num_augmentations]:  # Skip the first (already applied)
-                    # Apply transform to each image in batch
-                    batch_aug = torch.stack([
-                        transform(img) for img in batch_pil
-                    ]).to(DEVICE)
-
-                    # Get predictions for this augmentation
-                    with autocast():
-                        outputs_aug = model(batch_aug)
-
-                    all_outputs.append(outputs_aug)
-
-                # Average predictions across all augmentations
-                outputs = torch.stack(all_outputs).mean(0)
+                aug_batches = [
+                    torch.stack([transform(img) for img in batch_pil])
+                    for transform in tta_transforms[1:num_augmentations]  # Skip the first (already applied)
+                ]
+                with autocast():
+                    outputs_aug = model(torch.cat(aug_batches).to(DEVICE))
+                outputs = torch.cat([
+                    outputs_orig.unsqueeze(0),
+                    outputs_aug.view(len(aug_batches), batch_size, -1)
+                ]).mean(0)
             else:
                 outputs = outputs_orig
 
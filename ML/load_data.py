@@ -1,6 +1,10 @@
 import pandas as pd
 
 # Step 1: Load the datasets
+# These TSVs are ragged — the header carries a trailing "Unnamed" column
+# and every data row is one field short — which the C engine pads with
+# NaN but pyarrow's reader rejects outright, so stick with the default
+# engine here.
 keystrokes_df = pd.read_csv("C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\keystrokes.tsv", sep='\t')
 usercondition_df = pd.read_csv("C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\usercondition.tsv", sep='\t')
 mouse_mov_speeds_df = pd.read_csv("C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\mouse_mov_speeds.tsv", sep='\t')
@@ -13,11 +17,13 @@ mouse_mov_speeds_df = mouse_mov_speeds_df.drop(columns=['Unnamed: 3'], errors='i
 mousedata_df = mousedata_df.drop(columns=['Unnamed: 5'], errors='ignore')
 
 # Convert all 'Time' columns to datetime
-keystrokes_df['Press_Time'] = pd.to_datetime(keystrokes_df['Press_Time'], errors='coerce')
-keystrokes_df['Relase_Time'] = pd.to_datetime(keystrokes_df['Relase_Time'], errors='coerce')
-usercondition_df['Time'] = pd.to_datetime(usercondition_df['Time'], errors='coerce')
-mouse_mov_speeds_df['Time'] = pd.to_datetime(mouse_mov_speeds_df['Time'], errors='coerce')
-mousedata_df['Time'] = pd.to_datetime(mousedata_df['Time'], errors='coerce')
+# (explicit format avoids per-row inference; cache reuses duplicate parses)
+TS_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+keystrokes_df['Press_Time'] = pd.to_datetime(keystrokes_df['Press_Time'], format=TS_FORMAT, errors='coerce', cache=True)
+keystrokes_df['Relase_Time'] = pd.to_datetime(keystrokes_df['Relase_Time'], format=TS_FORMAT, errors='coerce', cache=True)
+usercondition_df['Time'] = pd.to_datetime(usercondition_df['Time'], format=TS_FORMAT, errors='coerce', cache=True)
+mouse_mov_speeds_df['Time'] = pd.to_datetime(mouse_mov_speeds_df['Time'], format=TS_FORMAT, errors='coerce', cache=True)
+mousedata_df['Time'] = pd.to_datetime(mousedata_df['Time'], format=TS_FORMAT, errors='coerce', cache=True)
 
 # Drop rows with any invalid timestamps
 keystrokes_df = keystrokes_df.dropna(subset=['Press_Time', 'Relase_Time'])
@@ -12,7 +12,8 @@ from imblearn.over_sampling import SMOTE
 df = pd.read_csv("C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\session_features.csv")
 
 # print(df['stress_label'].unique())
-df['stress_binary'] = df['stress_label'].apply(lambda x: 1 if 'Stressed' in x else 0)
+# Vectorized label encoding instead of a per-row Python lambda
+df['stress_binary'] = df['stress_label'].str.contains('Stressed', regex=False).astype('int8')
 # print(df[['stress_binary', 'stress_label']])
 
 # Encode the categorical target label
@@ -27,7 +28,7 @@ feature_columns = [
 ]
 
 # Prepare feature matrix X and label vector y
-X = df[feature_columns]
+X = df[feature_columns].astype('float32')  # RF trains on float32 natively
 y = df['stress_binary'] # This is For binary classification
 # y = df['stress_label_encoded'] # This is For normal (the default classes which are present) classification
 
@@ -1,8 +1,8 @@
-from flask import Flask, request, Response, stream_with_context, jsonify
+from flask import Flask, request, Response, stream_with_context, jsonify, g
 from config import Config
 from extensions import db
 from flask_migrate import Migrate
-from sqlalchemy import func
+from sqlalchemy import func, select
 
 from services.auth_service import register_user, login_user
 from services.tracking_service import start_tracking, stop_tracking
@@ -12,6 +12,7 @@ from services.stress_behavior_service import (
     init_service as behavior_init_service,
     health_check as behavior_health_check,
     predict_from_row as behavior_predict_from_row,
+    predict_from_rows as behavior_predict_from_rows,
     train_user_calibrator as behavior_train_user_calibrator,
     latest_window_features as behavior_latest_window_features
 )
@@ -24,6 +25,12 @@ from models import Chat, ChatMessage, ChatSummary, UserMemory  # new models
 import os
 import signal
 import atexit
+import logging
+
+# print() serializes on the stdout lock under load; route diagnostics
+# through logging with a level switchable via env instead.
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+log = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -37,6 +44,21 @@ jwt = JWTManager(app)
 # Initialize behavior predictor once at startup (CPU-only, lightweight)
 behavior_init_service()
 
+def current_uid():
+    """JWT identity as an int (or None), parsed once per request.
+
+    Tokens carry the user id as a string — flask-jwt-extended requires a
+    str sub claim — so every route repeated the same try/int() dance.
+    Memoized on flask.g so repeated calls within a request are free.
+    """
+    if "uid" not in g:
+        uid = get_jwt_identity()
+        try:
+            g.uid = int(uid) if uid is not None else None
+        except ValueError:
+            g.uid = None
+    return g.uid
+
 # -----------------------------------------
 # PID-based tracker cleanup on Flask exit
 # -----------------------------------------
@@ -120,6 +142,25 @@ def stress_behavior_predict():
     except Exception as e:
         return jsonify({"ok": False, "error": str(e)}), 400
 
+@app.route("/api/stress/behavior/predict-batch", methods=["POST"])
+@jwt_required(optional=True)
+def stress_behavior_predict_batch():
+    """
+    Body JSON: { "rows": [ <30s behavior window>, ... ] } — windows ordered
+    oldest-first (e.g. a client replaying buffered windows after reconnect).
+    Scored in one pass; same per-row result shape as /predict.
+    """
+    try:
+        payload = request.get_json(silent=True) or {}
+        rows = payload.get("rows") or []
+        uid = get_jwt_identity()
+        results = behavior_predict_from_rows(
+            rows, user_id=str(uid) if uid is not None else payload.get("user_id")
+        )
+        return jsonify({"ok": True, "count": len(results), "results": results}), 200
+    except Exception as e:
+        return jsonify({"ok": False, "error": str(e)}), 400
+
 @app.route("/api/stress/behavior/calibrate", methods=["POST"])
 @jwt_required(optional=True)
 def stress_behavior_calibrate():
@@ -155,11 +196,7 @@ def stress_behavior_latest_window():
 @app.route("/api/chats", methods=["POST"])
 @jwt_required()  # must be logged in to create a persistent chat
 def create_chat():
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
-        user_id = None
+    user_id = current_uid()
 
     body = request.get_json(silent=True) or {}
     title = (body.get("title") or "").strip() or None
@@ -173,22 +210,23 @@ def create_chat():
 
     # ✅ New logic: if this is a normal chat with no provided title,
     # and the user already has an EMPTY chat (0 messages), reuse it.
+    # One aggregate query (outer join + HAVING COUNT = 0) instead of
+    # loading every chat and issuing a COUNT per chat.
     if not is_journal and title is None:
-        # newest first
-        candidates = (
-            Chat.query
-            .filter_by(user_id=user_id, is_journal=False)
+        empty = (
+            db.session.query(Chat)
+            .outerjoin(ChatMessage, ChatMessage.chat_id == Chat.id)
+            .filter(Chat.user_id == user_id, Chat.is_journal == False)
+            .group_by(Chat.id)
+            .having(func.count(ChatMessage.id) == 0)
             .order_by(
                 func.coalesce(Chat.updated_at, Chat.created_at).desc(),
                 Chat.id.desc()
             )
-            .all()
+            .first()
         )
-        for c in candidates:
-            # Count messages for this chat; reuse the first empty one.
-            msg_count = ChatMessage.query.filter_by(chat_id=c.id).count()
-            if msg_count == 0:
-                return jsonify({"chat_id": c.id, "title": c.title, "is_journal": c.is_journal}), 200
+        if empty:
+            return jsonify({"chat_id": empty.id, "title": empty.title, "is_journal": empty.is_journal}), 200
 
     # Otherwise create a new chat
     chat = Chat(user_id=user_id, title=title, is_journal=is_journal)
@@ -200,12 +238,10 @@ def create_chat():
 @app.route("/api/chats", methods=["GET"])
 @jwt_required()
 def list_chats():
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
+    user_id = current_uid()
+    if user_id is None:
         return jsonify({"error": "Invalid token"}), 401
-    print(user_id)
+    log.debug("list_chats for user %s", user_id)
     rows = (
         Chat.query
         .filter_by(user_id=user_id)
@@ -231,39 +267,40 @@ def list_chats():
 @app.route("/api/chats/<int:chat_id>/messages", methods=["GET"])
 @jwt_required()
 def get_chat_messages(chat_id: int):
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
-        user_id = None
+    user_id = current_uid()
     chat = Chat.query.filter_by(id=chat_id, user_id=user_id).first()
     if not chat:
         return jsonify({"error": "Chat not found"}), 404
     limit = int(request.args.get("limit", 100))
-    rows = (ChatMessage.query
-            .filter_by(chat_id=chat_id)
+    # Pick the newest N ids in a subquery, then select those rows ascending:
+    # the DB hands back rows already oldest-first, so no Python-side
+    # reversed() pass over the materialized ORM objects.
+    subq = (select(ChatMessage.id)
+            .where(ChatMessage.chat_id == chat_id)
             .order_by(ChatMessage.id.desc())
             .limit(limit)
-            .all())
-    rows = list(reversed(rows))
+            .subquery())
+    rows = db.session.scalars(
+        select(ChatMessage)
+        .where(ChatMessage.id.in_(select(subq.c.id)))
+        .order_by(ChatMessage.id.asc())
+    )
     return jsonify({"messages": [{"id": r.id, "role": r.role, "content": r.content, "created_at": r.created_at.isoformat()} for r in rows]})
 
 
 @app.route("/api/chats/<int:chat_id>", methods=["DELETE"])
 @jwt_required()
 def delete_chat(chat_id: int):
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
-        user_id = None
-    chat = Chat.query.filter_by(id=chat_id, user_id=user_id).first()
-    if not chat:
+    user_id = current_uid()
+    # hard delete (simple): one DELETE on chats; the chat_messages and
+    # chat_summaries rows go with it via ON DELETE CASCADE in the database.
+    # synchronize_session=False: nothing from this chat is loaded in the
+    # session here, so skip the identity-map sync and issue the bare DELETE.
+    deleted = Chat.query.filter_by(id=chat_id, user_id=user_id).delete(
+        synchronize_session=False)
+    if not deleted:
+        db.session.rollback()
         return jsonify({"error": "Chat not found"}), 404
-    # hard delete (simple)
-    ChatMessage.query.filter_by(chat_id=chat_id).delete()
-    ChatSummary.query.filter_by(chat_id=chat_id).delete()
-    db.session.delete(chat)
     db.session.commit()
     return jsonify({"message": "Deleted"}), 200
 
@@ -272,11 +309,7 @@ def delete_chat(chat_id: int):
 @app.route("/api/profile/memory", methods=["GET"])
 @jwt_required()
 def get_profile_memory():
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
-        user_id = None
+    user_id = current_uid()
     rows = (UserMemory.query
             .filter_by(user_id=user_id)
             .order_by(UserMemory.score.desc(), UserMemory.updated_at.desc())
@@ -287,11 +320,7 @@ def get_profile_memory():
 @app.route("/api/profile/memory", methods=["POST"])
 @jwt_required()
 def upsert_profile_memory():
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
-        user_id = None
+    user_id = current_uid()
     body = request.get_json(silent=True) or {}
     items = body.get("items", [])
     for it in items:
@@ -322,11 +351,7 @@ def chatbot_route():
 @app.route("/api/chatbot/stream", methods=["GET"])
 @jwt_required(optional=True)
 def chatbot_stream_route():
-    uid = get_jwt_identity()
-    try:
-        user_id = int(uid) if uid is not None else None
-    except ValueError:
-        user_id = None  # None if not logged in
+    user_id = current_uid()  # None if not logged in
     session_id = request.args.get("session_id", "")
     chat_id = request.args.get("chat_id", "")
     chat_id = int(chat_id) if (chat_id and chat_id.isdigit()) else None
@@ -349,4 +374,8 @@ def chatbot_reset_route():
 
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # Dev entrypoint only. threaded=True keeps long-lived /api/chatbot/stream
+    # SSE connections from serializing every other request behind them.
+    # In production run a multi-worker WSGI server instead, e.g.:
+    #   gunicorn -k gevent -w 4 app:app
+    app.run(debug=os.getenv("FLASK_DEBUG", "1") == "1", threaded=True)
@@ -4,5 +4,15 @@ class Config:
     # Replace username, password, host, and databasename with your MySQL credentials
     SQLALCHEMY_DATABASE_URI = "mysql+pymysql://root:9ox(CK^C<W@localhost/majorproject"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pool sized for threaded/multi-worker serving with long-lived SSE
+    # streams in flight; the defaults (pool_size=5, max_overflow=10) stall
+    # requests on connection waits under that concurrency. pre_ping +
+    # recycle drop connections MySQL has silently timed out.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": 20,
+        "max_overflow": 40,
+        "pool_pre_ping": True,
+        "pool_recycle": 300,
+    }
     SECRET_KEY = "your-secret-key"
     JWT_SECRET_KEY = "your-jwt-secret-key"
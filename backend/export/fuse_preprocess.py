@@ -0,0 +1,57 @@
+# export/fuse_preprocess.py
+# One-off build step: prepend Cast(uint8->float) + Mul(1/255) to the
+# emotion graph so the service can feed raw uint8 48x48 tiles. The Python
+# astype/divide pass disappears, the request transfers 1/4 the bytes, and
+# ORT's optimizer can fold the scale into the first Conv.
+#
+# Usage: python fuse_preprocess.py [src.onnx [dst.onnx]]
+# Defaults: emotion.int8.onnx if built, else emotion.onnx -> emotion.preproc.onnx
+import os
+import sys
+
+import onnx
+from onnx import TensorProto, helper
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+_INT8 = os.path.join(HERE, "emotion.int8.onnx")
+DEFAULT_SRC = _INT8 if os.path.exists(_INT8) else os.path.join(HERE, "emotion.onnx")
+DEFAULT_DST = os.path.join(HERE, "emotion.preproc.onnx")
+
+
+def fuse(src: str, dst: str) -> None:
+    model = onnx.load(src)
+    graph = model.graph
+    orig_in = graph.input[0]
+    orig_name = orig_in.name
+
+    # Same shape as the original input, but uint8
+    new_in = onnx.ValueInfoProto()
+    new_in.CopyFrom(orig_in)
+    new_in.name = orig_name + "_u8"
+    new_in.type.tensor_type.elem_type = TensorProto.UINT8
+
+    cast = helper.make_node(
+        "Cast", [new_in.name], [orig_name + "_f32"], to=TensorProto.FLOAT,
+        name="preproc_cast",
+    )
+    mul = helper.make_node(
+        "Mul", [orig_name + "_f32", "preproc_scale"], [orig_name],
+        name="preproc_scale_mul",
+    )
+    graph.initializer.append(
+        helper.make_tensor("preproc_scale", TensorProto.FLOAT, [], [1.0 / 255.0])
+    )
+    graph.node.insert(0, mul)
+    graph.node.insert(0, cast)
+    graph.input.remove(orig_in)
+    graph.input.insert(0, new_in)
+
+    onnx.checker.check_model(model)
+    onnx.save(model, dst)
+    print(f"✅ Fused preprocessing: {src} -> {dst} (input {new_in.name}, uint8)")
+
+
+if __name__ == "__main__":
+    src = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SRC
+    dst = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DST
+    fuse(src, dst)
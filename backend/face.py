@@ -1,4 +1,5 @@
-import os, time, csv, argparse, threading
+import os, time, csv, argparse, threading, queue
+from collections import deque
 from pathlib import Path
 import cv2, numpy as np
 from tensorflow.keras.models import load_model
@@ -45,73 +46,88 @@ def norm_probs(v):
 
 # ---------- Behavior aggregator (logging only) ----------
 class BehaviorAggregator:
+    # Listener callbacks only append raw events to per-stream deques
+    # (deque.append is atomic under the GIL, so no lock on the hot path);
+    # all derivation happens once per window in summarize().
     def __init__(self):
-        self.lock = threading.Lock()
-        self.keydown_times = {}; self.dwell_times = []; self.ikg_times = []
-        self.ks_event_count = 0; self.ks_keydowns = 0; self.ks_keyups = 0; self.ks_keys_seen = set(); self.last_keydown_time=None
-        self.mouse_move_count = 0; self.mouse_click_count = 0; self.mouse_scroll_count = 0
-        self.mouse_total_distance = 0.0; self.mouse_last_pos=None; self.mouse_last_time=None; self.mouse_speeds=[]
-        self.active_seconds = set()
-    def reset(self): 
-        with self.lock: self.__init__()
-    def _mark(self,t): self.active_seconds.add(int(t))
+        self.key_q = deque(maxlen=65536)    # (0=down/1=up, key, t)
+        self.mouse_q = deque(maxlen=65536)  # (0=move/1=click/2=scroll, x, y, t)
+    def reset(self):
+        self.key_q.clear(); self.mouse_q.clear()
     # keyboard
-    def on_keydown(self,k,t):
-        with self.lock:
-            self.ks_event_count += 1; self.ks_keydowns += 1; self.ks_keys_seen.add(str(k))
-            if self.last_keydown_time is not None: self.ikg_times.append((t-self.last_keydown_time)*1000.0)
-            self.last_keydown_time = t; self.keydown_times[str(k)] = t; self._mark(t)
-    def on_keyup(self,k,t):
-        with self.lock:
-            self.ks_event_count +=1; self.ks_keyups +=1; kk=str(k)
-            if kk in self.keydown_times:
-                dt=(t-self.keydown_times[kk])*1000.0
-                if 0<=dt<5000: self.dwell_times.append(dt)
-                del self.keydown_times[kk]
-            self._mark(t)
+    def on_keydown(self,k,t): self.key_q.append((0,str(k),t))
+    def on_keyup(self,k,t):   self.key_q.append((1,str(k),t))
     # mouse
-    def on_move(self,x,y,t):
-        with self.lock:
-            self.mouse_move_count += 1
-            if self.mouse_last_pos is not None and self.mouse_last_time is not None:
-                dx=x-self.mouse_last_pos[0]; dy=y-self.mouse_last_pos[1]; dist=(dx*dx+dy*dy)**0.5
-                dt=max(1e-3,t-self.mouse_last_time); self.mouse_total_distance += dist; self.mouse_speeds.append(dist/dt)
-            self.mouse_last_pos=(x,y); self.mouse_last_time=t; self._mark(t)
+    def on_move(self,x,y,t):  self.mouse_q.append((0,x,y,t))
     def on_click(self,x,y,button,pressed,t):
-        with self.lock:
-            if pressed: self.mouse_click_count += 1; self._mark(t)
-    def on_scroll(self,x,y,dx,dy,t):
-        with self.lock:
-            self.mouse_scroll_count += 1; self._mark(t)
+        if pressed: self.mouse_q.append((1,x,y,t))
+    def on_scroll(self,x,y,dx,dy,t): self.mouse_q.append((2,x,y,t))
     def summarize(self,t0,t1):
-        with self.lock:
-            def stats(a):
-                if not a: return (0.0,0.0,0.0)
-                a=np.array(a,dtype=np.float32); return float(np.mean(a)), float(np.median(a)), float(np.percentile(a,95))
-            mdw,mdw_med,mdw_p95 = stats(self.dwell_times)
-            mikg,mikg_med,mikg_p95 = stats(self.ikg_times)
-            mean_speed = float(np.mean(self.mouse_speeds)) if self.mouse_speeds else 0.0
-            max_speed  = float(np.max(self.mouse_speeds)) if self.mouse_speeds else 0.0
-            active_frac = len([s for s in self.active_seconds if (t0 <= s < t1)]) / max(1.0,(t1-t0))
-            return {
-                "ks_event_count": int(self.ks_event_count),
-                "ks_keydowns": int(self.ks_keydowns),
-                "ks_keyups": int(self.ks_keyups),
-                "ks_unique_keys": int(len(self.ks_keys_seen)),
-                "ks_mean_dwell_ms": round(mdw,3),
-                "ks_median_dwell_ms": round(mdw_med,3),
-                "ks_p95_dwell_ms": round(mdw_p95,3),
-                "ks_mean_ikg_ms": round(mikg,3),
-                "ks_median_ikg_ms": round(mikg_med,3),
-                "ks_p95_ikg_ms": round(mikg_p95,3),
-                "mouse_move_count": int(self.mouse_move_count),
-                "mouse_click_count": int(self.mouse_click_count),
-                "mouse_scroll_count": int(self.mouse_scroll_count),
-                "mouse_total_distance_px": round(self.mouse_total_distance,3),
-                "mouse_mean_speed_px_s": round(mean_speed,3),
-                "mouse_max_speed_px_s": round(max_speed,3),
-                "active_seconds_fraction": round(active_frac,6),
-            }
+        # snapshot the queues; producers keep appending without blocking
+        key_events = list(self.key_q); mouse_events = list(self.mouse_q)
+        keydown_times={}; dwell_times=[]; ikg_times=[]; keys_seen=set(); last_keydown=None
+        keydowns=0; keyups=0; active_seconds=set()
+        for kind,k,t in key_events:
+            active_seconds.add(int(t))
+            if kind==0:
+                keydowns += 1; keys_seen.add(k)
+                if last_keydown is not None: ikg_times.append((t-last_keydown)*1000.0)
+                last_keydown=t; keydown_times[k]=t
+            else:
+                keyups += 1
+                td=keydown_times.pop(k,None)
+                if td is not None:
+                    dt=(t-td)*1000.0
+                    if 0<=dt<5000: dwell_times.append(dt)
+        move_count=0; click_count=0; scroll_count=0
+        total_distance=0.0; speeds=[]; last_pos=None; last_time=None
+        for kind,x,y,t in mouse_events:
+            active_seconds.add(int(t))
+            if kind==0:
+                move_count += 1
+                if last_pos is not None:
+                    dx=x-last_pos[0]; dy=y-last_pos[1]; dist=(dx*dx+dy*dy)**0.5
+                    total_distance += dist; speeds.append(dist/max(1e-3,t-last_time))
+                last_pos=(x,y); last_time=t
+            elif kind==1: click_count += 1
+            else: scroll_count += 1
+        def stats(a):
+            if not a: return (0.0,0.0,0.0)
+            a=np.fromiter(a,dtype=np.float32,count=len(a))
+            med,p95=np.percentile(a,[50,95])  # one partition pass for both quantiles
+            return float(a.mean()), float(med), float(p95)
+        mdw,mdw_med,mdw_p95 = stats(dwell_times)
+        mikg,mikg_med,mikg_p95 = stats(ikg_times)
+        if speeds:
+            sp=np.fromiter(speeds,dtype=np.float32,count=len(speeds))
+            mean_speed=float(sp.mean()); max_speed=float(sp.max())
+        else:
+            mean_speed=0.0; max_speed=0.0
+        if active_seconds:
+            secs=np.fromiter(active_seconds,dtype=np.int64,count=len(active_seconds))
+            n_active=int(np.count_nonzero((secs>=t0)&(secs<t1)))
+        else:
+            n_active=0
+        active_frac = n_active / max(1.0,(t1-t0))
+        return {
+            "ks_event_count": int(keydowns+keyups),
+            "ks_keydowns": int(keydowns),
+            "ks_keyups": int(keyups),
+            "ks_unique_keys": int(len(keys_seen)),
+            "ks_mean_dwell_ms": round(mdw,3),
+            "ks_median_dwell_ms": round(mdw_med,3),
+            "ks_p95_dwell_ms": round(mdw_p95,3),
+            "ks_mean_ikg_ms": round(mikg,3),
+            "ks_median_ikg_ms": round(mikg_med,3),
+            "ks_p95_ikg_ms": round(mikg_p95,3),
+            "mouse_move_count": int(move_count),
+            "mouse_click_count": int(click_count),
+            "mouse_scroll_count": int(scroll_count),
+            "mouse_total_distance_px": round(total_distance,3),
+            "mouse_mean_speed_px_s": round(mean_speed,3),
+            "mouse_max_speed_px_s": round(max_speed,3),
+            "active_seconds_fraction": round(active_frac,6),
+        }
 
 # -------------- CSV --------------
 CSV_FIELDS = [
@@ -150,6 +166,41 @@ def main():
     print(f"Loading face model: {args.model}")
     model = load_model(args.model); print("Model loaded.")
 
+    # model.predict carries Keras's per-call dispatch (progress-bar setup,
+    # callback hooks, dataset wrapping) — far too heavy for one 48x48 ROI
+    # per frame. Convert once to TFLite and run the interpreter (XNNPACK
+    # SIMD conv kernels); if conversion fails, fall back to calling the
+    # model directly, which still skips the predict() machinery.
+    try:
+        import tensorflow as tf
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        # Dynamic-range quantization: conv/dense weights are stored int8
+        # (4x smaller, XNNPACK int8 dot-product kernels) while activations
+        # stay float, so no calibration dataset is needed — this script has
+        # none at runtime. I/O stays float32, so callers are unaffected.
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        tflite_bytes = converter.convert()
+        interp = tf.lite.Interpreter(model_content=tflite_bytes, num_threads=4)
+        interp.allocate_tensors()
+        _in_idx = interp.get_input_details()[0]["index"]
+        _out_idx = interp.get_output_details()[0]["index"]
+        _cur_batch = [1]
+        def infer(face_t):
+            face_t = face_t.astype(np.float32)
+            if face_t.shape[0] != _cur_batch[0]:
+                # batch size changed (multi-face frame): re-plan once
+                interp.resize_tensor_input(_in_idx, face_t.shape)
+                interp.allocate_tensors()
+                _cur_batch[0] = face_t.shape[0]
+            interp.set_tensor(_in_idx, face_t)
+            interp.invoke()
+            return interp.get_tensor(_out_idx)
+        print("Inference: TFLite interpreter (XNNPACK).")
+    except Exception as e:
+        print(f"[INFO] TFLite conversion unavailable ({e}); calling model directly.")
+        def infer(face_t):
+            return np.asarray(model(face_t, training=False))
+
     # Camera + detector
     cap = cv2.VideoCapture(args.camera)
     if not cap.isOpened(): print("Error: Could not open webcam"); return
@@ -195,41 +246,85 @@ def main():
     fps_last=time.time(); fps_counter=0; fps=0.0
     print(f"[CSV] Writing to: {out_csv.resolve()}")
 
+    # Capture + flip + grayscale run in a producer thread: cap.read() blocks
+    # ~1/camera-fps and OpenCV releases the GIL in its C routines, so the
+    # wait now overlaps detection/inference instead of serializing with it.
+    # maxsize=2 with drop-oldest keeps the consumer on fresh frames.
+    frame_q = queue.Queue(maxsize=2)
+    capture_stop = threading.Event()
+    def _capture():
+        while not capture_stop.is_set():
+            ok, f = cap.read()
+            if not ok:
+                frame_q.put(None)  # tell the consumer capture died
+                break
+            f = cv2.flip(f, 1)
+            g = cv2.cvtColor(f, cv2.COLOR_BGR2GRAY)
+            try:
+                frame_q.put_nowait((f, g))
+            except queue.Full:
+                try: frame_q.get_nowait()   # drop the stale frame
+                except queue.Empty: pass
+                try: frame_q.put_nowait((f, g))
+                except queue.Full: pass
+    cap_thread = threading.Thread(target=_capture, daemon=True); cap_thread.start()
+
+    # Cascade cost scales with pixel count, and it is the most expensive
+    # non-DL step per frame. Run it on a half-resolution frame (4x less
+    # work) and only every DETECT_EVERY frames, holding the last boxes in
+    # between — at webcam rates a face barely moves across 5 frames.
+    # (A MOSSE tracker could refine the held boxes but needs opencv-contrib.)
+    DETECT_EVERY = 5
+    DETECT_SCALE = 0.5
+    detect_idx = 0
+    faces = []
+
     try:
         while True:
-            ok, frame = cap.read()
-            if not ok: print("Error: Failed to capture frame."); break
-            frame = cv2.flip(frame, 1)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            item = frame_q.get()
+            if item is None: print("Error: Failed to capture frame."); break
+            frame, gray = item
 
-            faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5,
-                                                  minSize=(30,30), flags=cv2.CASCADE_SCALE_IMAGE)
+            if detect_idx % DETECT_EVERY == 0:
+                small = cv2.resize(gray, (0,0), fx=DETECT_SCALE, fy=DETECT_SCALE)
+                det = face_cascade.detectMultiScale(small, scaleFactor=1.1, minNeighbors=5,
+                                                    minSize=(15,15), flags=cv2.CASCADE_SCALE_IMAGE)
+                inv = 1.0/DETECT_SCALE
+                faces = [(int(x*inv), int(y*inv), int(w*inv), int(h*inv)) for (x,y,w,h) in det]
+            detect_idx += 1
             if len(faces)>0:
-                # largest face
-                areas=[w*h for (x,y,w,h) in faces]; i=int(np.argmax(areas))
-                x,y,w,h = faces[i]
-                face_t = frame_to_face_tensor(gray, (x,y,w,h))
-                if face_t is not None:
-                    raw = model.predict(face_t, verbose=0)[0]
-                    probs = norm_probs(raw)
-                    idx = int(np.argmax(probs))
-                    label = EMOTION_LABELS[idx]
-                    conf  = float(probs[idx])
-
-                    # strict face-only accumulation:
-                    if not label.lower().startswith(NO_ANX_PREFIX):  # any Anxiety class
-                        stress_sum += conf   # add ONLY confidence of Anxiety class
-                    # else add 0
+                # Stack every detected ROI into one (K,48,48,1) batch and
+                # run a single inference — K tiny per-face launches collapse
+                # into one, and fixed launch overhead dominates at 48x48.
+                rois=[]; boxes=[]
+                for (x,y,w,h) in faces:
+                    t = frame_to_face_tensor(gray, (x,y,w,h))
+                    if t is not None:
+                        rois.append(t[0]); boxes.append((x,y,w,h))
+                if rois:
+                    preds = infer(np.stack(rois))
+                    # largest face still drives the stress accumulation
+                    areas=[w*h for (x,y,w,h) in boxes]; i_main=int(np.argmax(areas))
+                    for i,(x,y,w,h) in enumerate(boxes):
+                        probs = norm_probs(preds[i])
+                        idx = int(np.argmax(probs))
+                        label = EMOTION_LABELS[idx]
+                        conf  = float(probs[idx])
 
-                    face_frame_count += 1
-                    pred_label_for_display = label
-                    pred_conf_for_display  = conf
+                        if i == i_main:
+                            # strict face-only accumulation:
+                            if not label.lower().startswith(NO_ANX_PREFIX):  # any Anxiety class
+                                stress_sum += conf   # add ONLY confidence of Anxiety class
+                            # else add 0
+                            face_frame_count += 1
+                            pred_label_for_display = label
+                            pred_conf_for_display  = conf
 
-                    # draw like your original
-                    if args.display:
-                        cv2.rectangle(frame,(x,y),(x+w,y+h),(0,255,0),2)
-                        cv2.putText(frame, f"{label}: {conf*100:.1f}%", (x, y-10),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2)
+                        # draw like your original
+                        if args.display:
+                            cv2.rectangle(frame,(x,y),(x+w,y+h),(0,255,0),2)
+                            cv2.putText(frame, f"{label}: {conf*100:.1f}%", (x, y-10),
+                                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2)
 
             frame_count += 1
             fps_counter += 1
@@ -279,6 +374,7 @@ def main():
             if args.display and (cv2.waitKey(1) & 0xFF) == ord('q'): break
 
     finally:
+        capture_stop.set()
         cap.release()
         if args.display: cv2.destroyAllWindows()
         for lst in listeners:
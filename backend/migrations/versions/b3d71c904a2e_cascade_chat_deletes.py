@@ -0,0 +1,44 @@
+"""cascade chat deletes
+
+Revision ID: b3d71c904a2e
+Revises: e9c4492fc575
+Create Date: 2025-09-20 18:42:11.204867
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d71c904a2e'
+down_revision = 'e9c4492fc575'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Recreate the chat_id FKs with ON DELETE CASCADE so deleting a chat
+    # removes its messages/summary in the same statement.
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.drop_constraint('chat_messages_ibfk_1', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'fk_chat_messages_chat_id_chats', 'chats',
+            ['chat_id'], ['id'], ondelete='CASCADE')
+
+    with op.batch_alter_table('chat_summaries', schema=None) as batch_op:
+        batch_op.drop_constraint('chat_summaries_ibfk_1', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'fk_chat_summaries_chat_id_chats', 'chats',
+            ['chat_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade():
+    with op.batch_alter_table('chat_summaries', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_chat_summaries_chat_id_chats', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'chat_summaries_ibfk_1', 'chats', ['chat_id'], ['id'])
+
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_chat_messages_chat_id_chats', type_='foreignkey')
+        batch_op.create_foreign_key(
+            'chat_messages_ibfk_1', 'chats', ['chat_id'], ['id'])
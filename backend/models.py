@@ -27,10 +27,19 @@ class Chat(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # lazy="raise" so an accidental per-chat lazy load in a list view fails
+    # loudly instead of silently issuing N+1 SELECTs; anything that needs
+    # messages must opt in with selectinload(Chat.messages).
+    # passive_deletes lets the ON DELETE CASCADE FKs do the cleanup.
+    messages = db.relationship(
+        "ChatMessage", backref="chat", lazy="raise", passive_deletes=True)
+    summary = db.relationship(
+        "ChatSummary", backref="chat", lazy="raise", passive_deletes=True, uselist=False)
+
 class ChatMessage(db.Model):
     __tablename__ = "chat_messages"
     id = db.Column(db.Integer, primary_key=True)
-    chat_id = db.Column(db.Integer, db.ForeignKey("chats.id"), index=True, nullable=False)
+    chat_id = db.Column(db.Integer, db.ForeignKey("chats.id", ondelete="CASCADE"), index=True, nullable=False)
     role = db.Column(db.String(10), nullable=False)  # "human" | "ai"
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
@@ -38,7 +47,7 @@ class ChatMessage(db.Model):
 class ChatSummary(db.Model):
     __tablename__ = "chat_summaries"
     id = db.Column(db.Integer, primary_key=True)
-    chat_id = db.Column(db.Integer, db.ForeignKey("chats.id"), unique=True, nullable=False)
+    chat_id = db.Column(db.Integer, db.ForeignKey("chats.id", ondelete="CASCADE"), unique=True, nullable=False)
     summary_text = db.Column(db.Text, nullable=False)
     msg_count_at = db.Column(db.Integer, default=0, nullable=False)  # how many messages were summarized
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,22 +1,40 @@
 import os
+import re
+import hashlib
 import subprocess
 import time
 import json
+import queue
+import logging
+import threading
 from collections import deque
 from typing import Dict, Tuple, List, Optional
 
-from flask import jsonify, Request
-from langchain_ollama import ChatOllama
-from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
+from flask import jsonify, Request, current_app
 
 from flask_jwt_extended import get_jwt_identity
 from extensions import db
 from models import Chat, ChatMessage, ChatSummary, UserMemory
 
+log = logging.getLogger(__name__)
+
+try:
+    import ollama  # pip install ollama
+except Exception:
+    ollama = None
+
 # ---------- Ollama bootstrap ----------
+# One process-wide client: the underlying httpx client keeps a connection
+# pool, so every chat turn reuses a warm TCP connection instead of
+# re-handshaking, and bursts can't exhaust ephemeral ports.
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://127.0.0.1:11434")
+_ollama_client = ollama.Client(host=OLLAMA_HOST, timeout=60) if ollama is not None else None
+
 def _ensure_ollama_running():
+    if _ollama_client is None:
+        return
     try:
-        _ = ChatOllama(model=os.getenv("STRESS_BOT_MODEL", "my-stress-bot"), temperature=0, num_thread=8)
+        _ollama_client.list()  # cheap GET /api/tags liveness probe
         return
     except Exception:
         try:
@@ -68,14 +86,55 @@ If the user expresses thoughts of self-harm, suicide, or being in immediate dang
 
 
 # ---------- Ephemeral per-session memory (for not-logged-in users) ----------
+# Backed by Redis when REDIS_URL (or STRESS_BOT_REDIS_URL) is set and the
+# client is importable: history then survives restarts, stays bounded via
+# LTRIM, and is shared across gunicorn workers (no sticky sessions needed).
+# Falls back to the in-process dict for the single-worker dev setup.
+try:
+    import redis as _redis
+except Exception:
+    _redis = None
+
+_REDIS_URL = os.getenv("STRESS_BOT_REDIS_URL") or os.getenv("REDIS_URL")
+_redis_client = None
+if _redis is not None and _REDIS_URL:
+    try:
+        _redis_client = _redis.Redis.from_url(_REDIS_URL, decode_responses=True)
+        _redis_client.ping()
+    except Exception:
+        _redis_client = None
+
+SESSION_TTL_SEC = int(os.getenv("STRESS_BOT_SESSION_TTL", "86400"))
+
+def _history_key(session_id: str) -> str:
+    return f"chat:hist:{session_id}"
+
 _SESSIONS: Dict[str, deque] = {}
-def _get_session_history(session_id: str) -> deque:
+
+def _get_session_history(session_id: str) -> List[dict]:
+    """Oldest-first list of {"role","content"} dicts for an ephemeral session."""
+    if _redis_client is not None:
+        raw = _redis_client.lrange(_history_key(session_id), 0, HISTORY_MESSAGES_MAX - 1)
+        # LPUSH stores newest first; entries are already in ollama's format
+        return [json.loads(item) for item in reversed(raw)]
+    if session_id not in _SESSIONS:
+        _SESSIONS[session_id] = deque(maxlen=HISTORY_MESSAGES_MAX)
+    return list(_SESSIONS[session_id])
+
+def _append_session_history(session_id: str, role: str, content: str) -> None:
+    if _redis_client is not None:
+        pipe = _redis_client.pipeline()
+        pipe.lpush(_history_key(session_id), json.dumps({"role": role, "content": content}))
+        pipe.ltrim(_history_key(session_id), 0, HISTORY_MESSAGES_MAX - 1)  # atomic length bound
+        pipe.expire(_history_key(session_id), SESSION_TTL_SEC)
+        pipe.execute()
+        return
     if session_id not in _SESSIONS:
         _SESSIONS[session_id] = deque(maxlen=HISTORY_MESSAGES_MAX)
-    return _SESSIONS[session_id]
+    _SESSIONS[session_id].append({"role": role, "content": content})
 
-# ---------- LangChain chat model (non-streaming) ----------
-_model = ChatOllama(model=MODEL_NAME, temperature=0.7, num_ctx=1024, num_thread=8)
+# Model options shared by the streaming and non-streaming paths
+_CHAT_OPTIONS = {"temperature": 0.7, "num_ctx": 1024, "num_thread": 8}
 
 # ---------- DB helpers ----------
 def _get_or_create_journal_chat(user_id: int) -> Chat:
@@ -142,6 +201,42 @@ def _insert_msg(chat_id: int, role: str, content: str) -> int:
     db.session.commit()
     return row.id
 
+# ---------- Background persistence (keeps DB I/O off the SSE path) ----------
+# The AI reply, auto-title and rolling summary are written by one daemon
+# thread fed through a queue, so the SSE generator finishes as soon as the
+# model does instead of blocking its final flush on commits — the summary
+# refresh even calls the model again, which could hold the stream open for
+# seconds. The human message still persists synchronously (the prompt
+# builder reads it back from the DB).
+_PERSIST_Q: "queue.Queue" = queue.Queue()
+_persist_lock = threading.Lock()
+_persist_thread = None
+
+def _persist_worker():
+    while True:
+        app, chat_id, ai_text = _PERSIST_Q.get()
+        try:
+            with app.app_context():
+                _insert_msg(chat_id, "ai", ai_text)
+                chat = db.session.get(Chat, chat_id)
+                if chat:
+                    _auto_title_if_needed(chat)
+                _maybe_update_summary(chat_id)
+        except Exception as e:
+            log.error("[chatbot] persist failed: %s: %s", type(e).__name__, e)
+        finally:
+            _PERSIST_Q.task_done()
+
+def _enqueue_persist(chat_id: int, ai_text: str) -> None:
+    global _persist_thread
+    if _persist_thread is None:
+        with _persist_lock:
+            if _persist_thread is None:
+                _persist_thread = threading.Thread(target=_persist_worker, daemon=True)
+                _persist_thread.start()
+    # Pass the real app object: the worker has no request context to lean on.
+    _PERSIST_Q.put((current_app._get_current_object(), chat_id, ai_text))
+
 def _clean_title(s: str) -> str:
     """Trim noise and keep a short, human-friendly title (3–6 words)."""
     s = (s or "").strip().splitlines()[0]
@@ -180,12 +275,12 @@ def _auto_title_if_needed(chat: Chat):
         {"role": "user", "content": f"Suggest a concise title from this first message:\n\n{seed}\n\nTitle:"},
     ]
     title = None
-    try:
-        import ollama
-        r = ollama.chat(model=MODEL_NAME, messages=prompt)
-        title = (r.get("message") or {}).get("content", "")
-    except Exception:
-        title = None
+    if _ollama_client is not None:
+        try:
+            r = _ollama_client.chat(model=MODEL_NAME, messages=prompt)
+            title = (r.get("message") or {}).get("content", "")
+        except Exception:
+            title = None
 
     cleaned = _clean_title(title or seed)
     chat.title = cleaned[:120]
@@ -208,9 +303,10 @@ def _summarize_chat(chat_id: int) -> Optional[str]:
     prompt = [{"role": "system", "content": summary_system},
               {"role": "user", "content": convo_text}]
 
+    if _ollama_client is None:
+        return None
     try:
-        import ollama
-        r = ollama.chat(model=MODEL_NAME, messages=prompt)
+        r = _ollama_client.chat(model=MODEL_NAME, messages=prompt)
         s = (r.get("message") or {}).get("content", "").strip()
         # Basic sanity: require at least two bullets
         bullets = [ln for ln in s.splitlines() if ln.strip().startswith(("-", "•", "*"))]
@@ -256,18 +352,54 @@ def _db_prompt_messages(user_id: int, chat_id: int, user_text: str) -> List[dict
     msgs.append({"role": "user", "content": user_text})
     return msgs
 
-def _session_prompt_messages(session_id: str, user_text: str, history: deque) -> List[dict]:
-    msgs: List[dict] = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for m in list(history):
-        if isinstance(m, HumanMessage):
-            msgs.append({"role": "user", "content": m.content})
-        elif isinstance(m, AIMessage):
-            msgs.append({"role": "assistant", "content": m.content})
-    msgs.append({"role": "user", "content": user_text})
-    return msgs
+def _session_prompt_messages(session_id: str, user_text: str, history: List[dict]) -> List[dict]:
+    # history is already stored in ollama's {"role","content"} format
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        *history,
+        {"role": "user", "content": user_text},
+    ]
 
 # ---------- Crisis nudge ----------
-_CRISIS = ["suicide", "self harm", "kill myself", "end my life", "abuse", "assault", "hurt myself"]
+# Compiled once at import: one scan of the raw message instead of a
+# lowercased copy plus a separate substring scan per keyword.
+_CRISIS_RE = re.compile(
+    r"suicide|self[\s-]?harm|kill myself|end my life|abuse|assault|hurt myself",
+    re.IGNORECASE,
+)
+
+# ---------- LLM response cache ----------
+# Identical prompts (same model, system prompt, recent history and user
+# message) repeat surprisingly often — boilerplate openers especially — and
+# each costs seconds of inference. With Redis available, replies are cached
+# under a digest of that context for a short TTL; a hit is a ~1ms GET.
+# Crisis-flagged messages are never cached.
+LLM_CACHE_TTL_SEC = int(os.getenv("STRESS_BOT_LLM_CACHE_TTL", "600"))
+
+def _llm_cache_key(context_texts: List[str], user_message: str) -> str:
+    h = hashlib.sha256()
+    h.update(MODEL_NAME.encode("utf-8"))
+    h.update(SYSTEM_PROMPT.encode("utf-8"))
+    for t in context_texts[-4:]:
+        h.update(t.encode("utf-8"))
+    h.update(user_message.encode("utf-8"))
+    return "llm:" + h.hexdigest()
+
+def _llm_cache_get(key: Optional[str]) -> Optional[str]:
+    if key is None or _redis_client is None:
+        return None
+    try:
+        return _redis_client.get(key)
+    except Exception:
+        return None
+
+def _llm_cache_set(key: Optional[str], reply: str) -> None:
+    if key is None or _redis_client is None or not reply:
+        return
+    try:
+        _redis_client.setex(key, LLM_CACHE_TTL_SEC, reply)
+    except Exception:
+        pass
 
 # ---------- Non-streaming JSON endpoint ----------
 def chat_with_bot(data) -> Tuple[object, int]:
@@ -283,6 +415,10 @@ def chat_with_bot(data) -> Tuple[object, int]:
         return jsonify({"error": "message and (session_id or chat_id) are required"}), 400
 
     user_id = get_jwt_identity()  # None if not logged in
+    cacheable = _CRISIS_RE.search(message) is None
+
+    if _ollama_client is None:
+        return jsonify({"error": "Missing python package: ollama"}), 500
 
     try:
         if user_id and chat_id:
@@ -292,11 +428,13 @@ def chat_with_bot(data) -> Tuple[object, int]:
             # Persist human first
             _insert_msg(chat_id, "human", message)
             msgs = _db_prompt_messages(user_id, chat_id, message)
-            result = _model.invoke([SystemMessage(content=m["content"]) if m["role"]=="system"
-                                    else (HumanMessage(content=m["content"]) if m["role"]=="user"
-                                          else AIMessage(content=m["content"]))
-                                    for m in msgs])
-            reply = result.content if hasattr(result, "content") else str(result)
+            cache_key = _llm_cache_key([m["content"] for m in msgs[:-1]], message) if cacheable else None
+            reply = _llm_cache_get(cache_key)
+            if reply is None:
+                # msgs is already in ollama's {"role","content"} format
+                res = _ollama_client.chat(model=MODEL_NAME, messages=msgs, options=_CHAT_OPTIONS)
+                reply = (res.get("message") or {}).get("content", "")
+                _llm_cache_set(cache_key, reply)
             _insert_msg(chat_id, "ai", reply)
             _auto_title_if_needed(chat)
             _maybe_update_summary(chat_id)
@@ -305,11 +443,15 @@ def chat_with_bot(data) -> Tuple[object, int]:
             if not session_id:
                 return jsonify({"error": "session_id required for guest mode"}), 400
             history = _get_session_history(session_id)
-            history.append(HumanMessage(content=message))
-            msgs = [SystemMessage(content=SYSTEM_PROMPT), *list(history)]
-            result = _model.invoke(msgs)
-            reply = result.content if hasattr(result, "content") else str(result)
-            history.append(AIMessage(content=reply))
+            _append_session_history(session_id, "user", message)
+            cache_key = _llm_cache_key([m["content"] for m in history], message) if cacheable else None
+            reply = _llm_cache_get(cache_key)
+            if reply is None:
+                msgs = _session_prompt_messages(session_id, message, history)
+                res = _ollama_client.chat(model=MODEL_NAME, messages=msgs, options=_CHAT_OPTIONS)
+                reply = (res.get("message") or {}).get("content", "")
+                _llm_cache_set(cache_key, reply)
+            _append_session_history(session_id, "assistant", reply)
 
         payload = {"response": reply}
         if session_id:
@@ -319,14 +461,23 @@ def chat_with_bot(data) -> Tuple[object, int]:
         return jsonify(payload), 200
 
     except Exception as e:
-        print(f"[chatbot][ERROR] {type(e).__name__}: {e}")
+        log.error("[chatbot] %s: %s", type(e).__name__, e)
         return jsonify({"error": f"Chat error: {e}"}), 500
 
 # ---------- Streaming SSE ----------
+# Frames are built as bytes, with orjson doing the JSON encode in C when
+# available — the WSGI layer then ships them as-is instead of re-encoding
+# an f-string per token.
 try:
-    import ollama  # pip install ollama
-except Exception:
-    ollama = None
+    import orjson
+
+    def _sse_frame(payload: dict) -> bytes:
+        return b"data: " + orjson.dumps(payload) + b"\n\n"
+except ImportError:
+    def _sse_frame(payload: dict) -> bytes:
+        return ("data: " + json.dumps(payload) + "\n\n").encode("utf-8")
+
+_SSE_DONE = b"data: [DONE]\n\n"
 
 def sse_stream(user_id: Optional[int], chat_id: Optional[int], session_id: Optional[str], user_message: str):
     """
@@ -334,16 +485,16 @@ def sse_stream(user_id: Optional[int], chat_id: Optional[int], session_id: Optio
     Persists to DB if user_id+chat_id are provided; else uses ephemeral session.
     """
     if not user_message or (not session_id and not chat_id):
-        yield f'data: {json.dumps({"error": "message and (session_id or chat_id) are required"})}\n\n'
-        yield 'data: [DONE]\n\n'
+        yield _sse_frame({"error": "message and (session_id or chat_id) are required"})
+        yield _SSE_DONE
         return
 
-    if ollama is None:
-        yield f'data: {json.dumps({"error": "Missing python package: ollama"})}\n\n'
-        yield 'data: [DONE]\n\n'
+    if _ollama_client is None:
+        yield _sse_frame({"error": "Missing python package: ollama"})
+        yield _SSE_DONE
         return
 
-    flagged = any(k in user_message.lower() for k in _CRISIS)
+    flagged = _CRISIS_RE.search(user_message) is not None
     prefix = (
         "I'm really sorry you're going through this. "
         "If you’re in immediate danger or considering self-harm, please contact local emergency services "
@@ -355,53 +506,70 @@ def sse_stream(user_id: Optional[int], chat_id: Optional[int], session_id: Optio
         if user_id and chat_id:
             chat = _assert_chat_ownership(user_id, chat_id)
             if not chat:
-                yield f'data: {json.dumps({"error": "Chat not found or not owned by user"})}\n\n'
-                yield 'data: [DONE]\n\n'
+                yield _sse_frame({"error": "Chat not found or not owned by user"})
+                yield _SSE_DONE
                 return
             _insert_msg(chat_id, "human", user_message)
             msgs = _db_prompt_messages(user_id, chat_id, user_message)
         else:
             # ephemeral mode
-            hist = _get_session_history(session_id) if session_id else deque()
-            hist.append(HumanMessage(content=user_message))
+            hist = _get_session_history(session_id) if session_id else []
+            if session_id:
+                _append_session_history(session_id, "user", user_message)
             msgs = _session_prompt_messages(session_id or "global", user_message, hist)
 
         # Stream from ollama
-        stream = ollama.chat(model=MODEL_NAME, messages=msgs, options={"temperature": 0.7}, stream=True)
+        stream = _ollama_client.chat(model=MODEL_NAME, messages=msgs, options={"temperature": 0.7}, stream=True)
 
         full_text = ""
         if prefix:
             full_text += prefix
-            yield f'data: {json.dumps({"token": prefix})}\n\n'
-
+            yield _sse_frame({"token": prefix})
+
+        # Coalesce tokens before framing: ollama emits one tiny chunk per
+        # token, and a frame per token costs one socket write (plus HTTP
+        # chunk framing) each. Buffer until ~64 chars or 20 ms accumulate
+        # so several tokens share a frame; the client concatenates frame
+        # text anyway, so nothing changes on its side.
+        buf = []
+        buf_len = 0
+        last_flush = time.monotonic()
         for chunk in stream:
             piece = (chunk.get("message") or {}).get("content", "")
             if piece:
                 full_text += piece
-                yield f'data: {json.dumps({"token": piece})}\n\n'
+                buf.append(piece)
+                buf_len += len(piece)
+                now = time.monotonic()
+                if buf_len >= 64 or (now - last_flush) > 0.02:
+                    yield _sse_frame({"token": "".join(buf)})
+                    buf.clear()
+                    buf_len = 0
+                    last_flush = now
             if chunk.get("done"):
                 break
+        if buf:
+            yield _sse_frame({"token": "".join(buf)})
 
         # Persist AI result (DB or ephemeral)
         if user_id and chat_id:
-            _insert_msg(chat_id, "ai", full_text)
-            _auto_title_if_needed(chat)
-            _maybe_update_summary(chat_id)
-        else:
-            hist = _get_session_history(session_id) if session_id else deque()
-            hist.append(AIMessage(content=full_text))
+            _enqueue_persist(chat_id, full_text)
+        elif session_id:
+            _append_session_history(session_id, "assistant", full_text)
 
     except Exception as e:
         err = f"Streaming error: {e}"
-        print(f"[chatbot][STREAM_ERROR] {err}")
-        yield f'data: {json.dumps({"error": err})}\n\n'
+        log.error("[chatbot] %s", err)
+        yield _sse_frame({"error": err})
 
-    yield 'data: [DONE]\n\n'
+    yield _SSE_DONE
 
 # ---------- Reset session (ephemeral) ----------
 def reset_session(data) -> Tuple[object, int]:
     session_id = (data or {}).get("session_id")
     if not session_id:
         return jsonify({"error": "session_id is required"}), 400
+    if _redis_client is not None:
+        _redis_client.delete(_history_key(session_id))
     _SESSIONS.pop(session_id, None)
     return jsonify({"message": "Session reset", "session_id": session_id}), 200
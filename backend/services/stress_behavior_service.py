@@ -1,13 +1,14 @@
 from __future__ import annotations
+import csv
 import json
+import math
+import struct
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 import threading
 
 import numpy as np
 import joblib
-import pandas as pd
-from sklearn.linear_model import LogisticRegression
 
 # ---------- Paths (LOCAL, for VS Code) ----------
 # Root is one level up from this file (../)
@@ -24,17 +25,34 @@ META_JSON  = ART / "global_head_meta.json"
 _LOCK = threading.Lock()
 _PREDICTOR = None  # type: Optional[BehaviorPredictor]
 _SMOOTHERS: Dict[str, "TemporalSmoother"] = {}  # per-user smoothing state
+_CALIBRATORS: Dict[str, "PlattCalibrator"] = {}  # per-user calibrators, loaded once
 
 
 # ---------- Utilities ----------
+# meta.json and the head path only change on retrain; cache both keyed by
+# the meta file's mtime so health checks stop re-reading and re-globbing
+# the artifacts directory on every call.
+_META_CACHE: Optional[Tuple[int, dict, Path]] = None
+
 def _load_meta() -> dict:
+    global _META_CACHE
     if not META_JSON.exists():
         raise FileNotFoundError(f"Missing meta JSON at {META_JSON}")
+    mtime = META_JSON.stat().st_mtime_ns
+    if _META_CACHE is not None and _META_CACHE[0] == mtime:
+        return _META_CACHE[1]
     with open(META_JSON, "r") as f:
-        return json.load(f)
+        meta = json.load(f)
+    _META_CACHE = (mtime, meta, _discover_head(meta))
+    return meta
 
 def _autodiscover_head(meta: dict) -> Path:
     """Find the saved global head based on meta naming; fallback to latest."""
+    if _META_CACHE is not None and _META_CACHE[1] is meta:
+        return _META_CACHE[2]
+    return _discover_head(meta)
+
+def _discover_head(meta: dict) -> Path:
     mode = meta.get("mode", "regression")
     # We saved head as: global_head_{mode}_behavior.joblib
     preferred = ART / f"global_head_{mode}_behavior.joblib"
@@ -46,14 +64,62 @@ def _autodiscover_head(meta: dict) -> Path:
         raise FileNotFoundError(f"No global_head_*.joblib found in {ART}")
     return cands[-1]
 
-def _extract_features(row: Dict, feature_names) -> np.ndarray:
-    """Build a [1, D] feature vector; missing fields default to 0.0."""
-    return np.array([float(row.get(name, 0.0) or 0.0) for name in feature_names], dtype=np.float32)[None, :]
-
 def _nz_count(vec: np.ndarray) -> int:
     return int(np.count_nonzero(np.asarray(vec)))
 
 
+# ---------- Scalar hot-path kernels ----------
+# These per-request scalar updates spend more time in interpreter dispatch
+# than in arithmetic; Numba compiles them to machine code when installed,
+# and both run unchanged as plain Python otherwise.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _ema_step(p, is_idle, ema, state, idle_count,
+              alpha_active, alpha_idle, on_t, off_t, idle_reset_k, baseline):
+    a = alpha_idle if is_idle else alpha_active
+    if ema != ema:  # NaN sentinel: first sample seeds the EMA
+        ema = p
+    else:
+        ema = a * p + (1.0 - a) * ema
+    # if idle repeatedly, snap back toward baseline quickly
+    if is_idle:
+        idle_count += 1
+        if idle_count >= idle_reset_k:
+            # hard reset EMA to baseline, and force calm
+            ema = baseline
+            state = 0
+    else:
+        idle_count = 0
+    # hysteresis on the EMA
+    if state == 0 and ema >= on_t:
+        state = 1
+    elif state == 1 and ema <= off_t:
+        state = 0
+    return ema, state, idle_count
+
+def _idle_kernel(ks_events, kd, ku, mm, mc, ms, act, eps):
+    return (ks_events <= eps and kd <= eps and ku <= eps and
+            mm <= eps and mc <= eps and ms <= eps and
+            act <= 0.02)  # ~ < 1 sec activity over 30s
+
+if njit is not None:
+    # Explicit signatures so numba compiles eagerly at import (once per
+    # machine thanks to cache=True) instead of on the first request.
+    _ema_step = njit(
+        "Tuple((float64, int64, int64))(float64, boolean, float64, int64, "
+        "int64, float64, float64, float64, float64, int64, float64)",
+        cache=True,
+    )(_ema_step)
+    _idle_kernel = njit(
+        "boolean(float64, float64, float64, float64, float64, float64, "
+        "float64, float64)",
+        cache=True,
+    )(_idle_kernel)
+
+
 # ---------- Activity-aware EMA + hysteresis ----------
 class TemporalSmoother:
     """
@@ -84,31 +150,18 @@ class TemporalSmoother:
         self._idle_count = 0
 
     def step(self, p: float, is_idle: bool) -> tuple[float, int]:
-        # choose alpha based on activity
-        a = self.alpha_idle if is_idle else self.alpha_active
-
-        if self._ema is None:
-            self._ema = p
-        else:
-            self._ema = a * p + (1 - a) * self._ema
-
-        # if idle repeatedly, snap back toward baseline quickly
-        if is_idle:
-            self._idle_count += 1
-            if self._idle_count >= self.idle_reset_k:
-                # hard reset EMA to baseline, and force calm
-                self._ema = self.baseline
-                self._state = 0
-        else:
-            self._idle_count = 0
-
-        # hysteresis on the EMA
-        if self._state == 0 and self._ema >= self.on_t:
-            self._state = 1
-        elif self._state == 1 and self._ema <= self.off_t:
-            self._state = 0
-
-        return float(self._ema), int(self._state)
+        # state update lives in the (optionally njit-compiled) kernel;
+        # NaN stands in for the "no EMA yet" None
+        ema = self._ema if self._ema is not None else float("nan")
+        ema, state, idle_count = _ema_step(
+            float(p), bool(is_idle), ema, self._state, self._idle_count,
+            self.alpha_active, self.alpha_idle, self.on_t, self.off_t,
+            self.idle_reset_k, self.baseline,
+        )
+        self._ema = float(ema)
+        self._state = int(state)
+        self._idle_count = int(idle_count)
+        return self._ema, self._state
 
     def force_off(self) -> None:
         self._state = 0
@@ -126,22 +179,51 @@ class PlattCalibrator:
 
     def fit(self, scores: np.ndarray, y: np.ndarray):
         # Convert weak labels to binary with 0.5 threshold (simple, effective)
-        yb = (y >= 0.5).astype(int)
-        lr = LogisticRegression(max_iter=1000, solver="liblinear")
-        lr.fit(scores.reshape(-1, 1), yb)
-        self.coef_ = float(lr.coef_[0, 0])
-        self.intercept_ = float(lr.intercept_[0])
+        yb = (y >= 0.5).astype(np.float64)
+        s = np.asarray(scores, dtype=np.float64).ravel()
+        # 1-D logistic regression fit by Newton's method on the 2x2 system —
+        # a dozen dot products over the score vector instead of pulling in a
+        # full sklearn solver for a two-parameter problem.
+        n_pos = float(yb.sum())
+        n_neg = float(len(yb) - n_pos)
+        a, b = 0.0, math.log((n_pos + 1.0) / (n_neg + 1.0))
+        for _ in range(25):
+            p = 1.0 / (1.0 + np.exp(-(a * s + b)))
+            d = p - yb
+            w = p * (1.0 - p)
+            g0, g1 = float(d @ s), float(d.sum())
+            h00, h01, h11 = float(w @ (s * s)), float(w @ s), float(w.sum())
+            det = h00 * h11 - h01 * h01 + 1e-12
+            da = (h11 * g0 - h01 * g1) / det
+            db = (h00 * g1 - h01 * g0) / det
+            a -= da
+            b -= db
+            if da * da + db * db < 1e-16:
+                break
+        self.coef_ = float(a)
+        self.intercept_ = float(b)
 
     def predict_proba(self, scores: np.ndarray) -> np.ndarray:
         # Only meaningful after fit(); callers should check is_fit()
         z = self.coef_ * scores + self.intercept_
         return 1.0 / (1.0 + np.exp(-z))
 
+    def predict_proba_scalar(self, score: float) -> float:
+        # Single-score variant of predict_proba for the per-request path:
+        # stays in plain floats, avoiding a 1-element ndarray each call.
+        return 1.0 / (1.0 + math.exp(-(self.coef_ * score + self.intercept_)))
+
     def to_dict(self) -> dict:
         return {"coef_": self.coef_, "intercept_": self.intercept_}
 
     @classmethod
     def from_file(cls, path: Path) -> "PlattCalibrator":
+        # New calibrators are two packed doubles; fall back to the JSON
+        # files older deployments wrote.
+        bin_path = path.with_suffix(".bin")
+        if bin_path.exists():
+            coef, intercept = struct.unpack("<dd", bin_path.read_bytes())
+            return cls(coef, intercept)
         if not path.exists():
             return cls()
         with open(path, "r") as f:
@@ -150,23 +232,24 @@ class PlattCalibrator:
 
     def save(self, path: Path):
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            json.dump(self.to_dict(), f, indent=2)
+        path.with_suffix(".bin").write_bytes(
+            struct.pack("<dd", self.coef_, self.intercept_)
+        )
 
 
 # ---------- Core predictor ----------
 def _is_idle(row: Dict, eps: float = 1e-6) -> bool:
     """Heuristic: absolutely no keyboard/mouse activity in this 30s window."""
-    ks_events = float(row.get("ks_event_count", 0.0) or 0.0)
-    kd = float(row.get("ks_keydowns", 0.0) or 0.0)
-    ku = float(row.get("ks_keyups", 0.0) or 0.0)
-    mm = float(row.get("mouse_move_count", 0.0) or 0.0)
-    mc = float(row.get("mouse_click_count", 0.0) or 0.0)
-    ms = float(row.get("mouse_scroll_count", 0.0) or 0.0)
-    act = float(row.get("active_seconds_fraction", 0.0) or 0.0)
-    return (ks_events <= eps and kd <= eps and ku <= eps and
-            mm <= eps and mc <= eps and ms <= eps and
-            act <= 0.02)  # ~ < 1 sec activity over 30s
+    return bool(_idle_kernel(
+        float(row.get("ks_event_count", 0.0) or 0.0),
+        float(row.get("ks_keydowns", 0.0) or 0.0),
+        float(row.get("ks_keyups", 0.0) or 0.0),
+        float(row.get("mouse_move_count", 0.0) or 0.0),
+        float(row.get("mouse_click_count", 0.0) or 0.0),
+        float(row.get("mouse_scroll_count", 0.0) or 0.0),
+        float(row.get("active_seconds_fraction", 0.0) or 0.0),
+        eps,
+    ))
 
 
 class BehaviorPredictor:
@@ -180,8 +263,36 @@ class BehaviorPredictor:
         head_path = _autodiscover_head(meta)
         if not SCALER_PKL.exists():
             raise FileNotFoundError(f"Missing scaler at {SCALER_PKL}")
-        self.scaler = joblib.load(SCALER_PKL)
-        self.head   = joblib.load(head_path)
+        # mmap the artifact arrays read-only: loads lazily from the page
+        # cache, and multiple workers on one box share the physical pages.
+        # The fused _w/_b below are private copies, so the mmap'd originals
+        # are never mutated on the hot path.
+        self.scaler = joblib.load(SCALER_PKL, mmap_mode="r")
+        self.head   = joblib.load(head_path, mmap_mode="r")
+
+        # Fuse scaler + linear head into one affine map at load time:
+        # z-scoring followed by w·x + b is itself affine, so precompute
+        # w' = w/scale and b' = b - w·(mean/scale). The per-request path
+        # then needs one dot product on the raw features instead of two
+        # sklearn dispatches with their validation and allocations.
+        self._w = None
+        self._b = 0.0
+        self._is_logistic = hasattr(self.head, "predict_proba")
+        coef = getattr(self.head, "coef_", None)
+        if coef is not None:
+            w = np.asarray(coef, dtype=np.float64).ravel()
+            scale = np.asarray(self.scaler.scale_, dtype=np.float64)
+            mean = np.asarray(self.scaler.mean_, dtype=np.float64)
+            self._w = (w / scale).astype(np.float32)
+            self._b = float(np.asarray(self.head.intercept_).ravel()[0]
+                            - np.dot(w, mean / scale))
+
+        # Feature-extraction scratch: the name tuple is fixed for the life
+        # of the predictor and the output buffer is reused per thread, so
+        # each request fills float32 memory in place instead of building a
+        # Python list plus a fresh ndarray with dtype inference.
+        self._feat_tuple = tuple(self.feature_names)
+        self._tls = threading.local()
 
         # thresholds from training (used to set hysteresis)
         self.default_thresh = float(meta.get("best_thresh", 0.5))
@@ -194,6 +305,39 @@ class BehaviorPredictor:
         # Idle clamp configuration
         self.idle_clamp = float(meta.get("idle_clamp_prob", 0.10))  # probability to use when fully idle
 
+        # Generate an unrolled scalar scorer for the fused weights: one
+        # straight-line expression of row.get() terms with the weights
+        # baked in as literals — no loop, no buffer, no ndarray dot for
+        # the single-row path. Regenerated whenever the predictor reloads.
+        self._fast_raw_prob = None
+        if self._w is not None:
+            self._fast_raw_prob = self._compile_fast_scorer()
+
+    def _compile_fast_scorer(self):
+        terms = " + ".join(
+            f"float(row.get({name!r}) or 0.0) * {float(w)!r}"
+            for name, w in zip(self._feat_tuple, self._w)
+        )
+        body = f"z = {terms} + {float(self._b)!r}\n"
+        if self._is_logistic:
+            body += "    return 1.0 / (1.0 + math.exp(-z))"
+        else:
+            body += "    return min(max(z, 0.0), 1.0)"
+        src = f"def _fast_raw_prob(row):\n    {body}\n"
+        ns = {"math": math}
+        exec(compile(src, "<fused-scorer>", "exec"), ns)
+        return ns["_fast_raw_prob"]
+
+    def extract_features(self, row: Dict) -> np.ndarray:
+        """Fill and return the per-thread [D] feature buffer; missing fields -> 0.0."""
+        buf = getattr(self._tls, "buf", None)
+        if buf is None:
+            buf = self._tls.buf = np.zeros(len(self._feat_tuple), dtype=np.float32)
+        for i, name in enumerate(self._feat_tuple):
+            v = row.get(name)
+            buf[i] = float(v) if v else 0.0
+        return buf
+
     def _head_prob(self, Xz: np.ndarray) -> float:
         # LogisticRegression: use predict_proba
         if hasattr(self.head, "predict_proba"):
@@ -202,15 +346,18 @@ class BehaviorPredictor:
         return float(np.clip(self.head.predict(Xz)[0], 0.0, 1.0))
 
     def predict(self, row: Dict, smoother: Optional[TemporalSmoother] = None) -> Dict:
-        x = _extract_features(row, self.feature_names)
-        xz = self.scaler.transform(x)
-        raw_prob = self._head_prob(xz)
+        if self._fast_raw_prob is not None:
+            raw_prob = self._fast_raw_prob(row)
+        else:
+            x = self.extract_features(row)
+            xz = self.scaler.transform(x[None, :])
+            raw_prob = self._head_prob(xz)
 
         # Optional per-user calibration
         user_id = str(row.get("user_id", "harsh"))
         cal = load_user_calibrator(user_id)
         if cal.is_fit():
-            cal_prob = float(cal.predict_proba(np.array([raw_prob]))[0])
+            cal_prob = cal.predict_proba_scalar(raw_prob)
             has_cal = True
         else:
             cal_prob = raw_prob
@@ -256,6 +403,15 @@ def init_service() -> None:
     with _LOCK:
         if _PREDICTOR is None:
             _PREDICTOR = BehaviorPredictor()
+            if njit is not None:
+                # Touch both kernels once so any residual JIT/cache-load
+                # cost lands at startup, not on the first user request.
+                try:
+                    _ema_step(0.2, False, float("nan"), 0, 0,
+                              0.3, 0.85, 0.6, 0.4, 2, 0.2)
+                    _idle_kernel(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 1e-6)
+                except Exception:
+                    pass
 
 def get_predictor() -> BehaviorPredictor:
     if _PREDICTOR is None:
@@ -285,6 +441,27 @@ def health_check() -> Dict:
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+def _smoother_for(pred: BehaviorPredictor, uid: str) -> TemporalSmoother:
+    # dict.get is atomic under the GIL, so the hot path skips the lock;
+    # only a cache miss takes it (and re-checks, in case another request
+    # created the smoother in between).
+    smoother = _SMOOTHERS.get(uid)
+    if smoother is None:
+        with _LOCK:
+            smoother = _SMOOTHERS.get(uid)
+            if smoother is None:
+                # IMPORTANT: use alpha_active / alpha_idle (no 'alpha' kw)
+                smoother = TemporalSmoother(
+                    alpha_active=pred.alpha,
+                    alpha_idle=0.85,
+                    on_thresh=pred.default_thresh + pred.on_delta,
+                    off_thresh=pred.default_thresh - pred.off_delta,
+                    idle_reset_k=2,
+                    baseline=0.20,
+                )
+                _SMOOTHERS[uid] = smoother
+    return smoother
+
 def predict_from_row(row: Dict, user_id: Optional[str] = None) -> Dict:
     """
     row: dict with behavior features (same names as training in meta.feature_names).
@@ -294,23 +471,12 @@ def predict_from_row(row: Dict, user_id: Optional[str] = None) -> Dict:
     """
     pred = get_predictor()
     uid = str(user_id or row.get("user_id") or "harsh")
-    with _LOCK:
-        smoother = _SMOOTHERS.get(uid)
-        if smoother is None:
-            # IMPORTANT: use alpha_active / alpha_idle (no 'alpha' kw)
-            smoother = TemporalSmoother(
-                alpha_active=pred.alpha,
-                alpha_idle=0.85,
-                on_thresh=pred.default_thresh + pred.on_delta,
-                off_thresh=pred.default_thresh - pred.off_delta,
-                idle_reset_k=2,
-                baseline=0.20,
-            )
-            _SMOOTHERS[uid] = smoother
+    smoother = _smoother_for(pred, uid)
 
-    # Build x in the trained order so we can report non-zero count
-    x = _extract_features(row, pred.feature_names)
     out = pred.predict({**row, "user_id": uid}, smoother)
+    # Fills the reusable per-thread buffer (no allocation); only needed
+    # for the non-zero feature count below.
+    x = pred.extract_features(row)
 
     # Small debug summary so you can verify backend sees activity (or idle)
     activity_summary = {
@@ -331,7 +497,102 @@ def predict_from_row(row: Dict, user_id: Optional[str] = None) -> Dict:
         "activity": activity_summary,
     }
 
+def predict_from_rows(rows: list, user_id: Optional[str] = None) -> list:
+    """
+    Batch variant of predict_from_row for backfills / reconnecting clients
+    that replay several 30s windows at once. Scores every row through the
+    fused affine in one matrix product, then applies calibration, the idle
+    guard and the (sequential, stateful) smoother per row in order.
+    Rows are assumed chronological oldest-first.
+    """
+    pred = get_predictor()
+    n = len(rows)
+    if n == 0:
+        return []
+
+    X = np.empty((n, len(pred.feature_names)), dtype=np.float32)
+    for i, row in enumerate(rows):
+        X[i] = pred.extract_features(row)
+
+    if pred._w is not None:
+        z = X @ pred._w + pred._b
+        if pred._is_logistic:
+            raw = 1.0 / (1.0 + np.exp(-z))
+        else:
+            raw = np.clip(z, 0.0, 1.0)
+    else:
+        Xz = pred.scaler.transform(X)
+        if hasattr(pred.head, "predict_proba"):
+            raw = pred.head.predict_proba(Xz)[:, 1]
+        else:
+            raw = np.clip(pred.head.predict(Xz), 0.0, 1.0)
+
+    results = []
+    for i, row in enumerate(rows):
+        uid = str(user_id or row.get("user_id") or "harsh")
+        raw_prob = float(raw[i])
+
+        cal = load_user_calibrator(uid)
+        has_cal = cal.is_fit()
+        cal_prob = cal.predict_proba_scalar(raw_prob) if has_cal else raw_prob
+
+        idle = _is_idle(row)
+        if idle:
+            cal_prob = min(cal_prob, pred.idle_clamp)
+
+        smoother = _smoother_for(pred, uid)
+        smoothed, is_on = smoother.step(cal_prob, is_idle=idle)
+        if idle:
+            smoother.force_off()
+            is_on = 0
+
+        results.append({
+            "user_id": uid,
+            "raw_prob": raw_prob,
+            "calibrated_prob": cal_prob,
+            "smoothed_prob": smoothed,
+            "is_stressed": bool(is_on),
+            "threshold_used": pred.default_thresh,
+            "has_calibrator": has_cal,
+        })
+    return results
+
 # ---- Return the latest 30s feature row from labels/stress_30s.csv ----
+# Header row per CSV path — the tracker only ever appends, so the header
+# never changes once written and can be parsed once per process.
+_CSV_HEADERS: Dict[str, list] = {}
+
+
+def _read_last_csv_row(csv_path: Path) -> dict:
+    """
+    Returns the last data row of an append-only CSV as a {column: str} dict
+    without loading the whole file: seek to EOF and walk backwards in 4 KiB
+    chunks until a complete final line is buffered.
+    """
+    key = str(csv_path)
+    with open(csv_path, "rb") as f:
+        header = _CSV_HEADERS.get(key)
+        if header is None:
+            header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+            _CSV_HEADERS[key] = header
+        f.seek(0, 2)
+        end = f.tell()
+        buf = b""
+        pos = end
+        while pos > 0 and buf.count(b"\n") < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = [ln for ln in buf.split(b"\n") if ln.strip()]
+    # the first buffered line may be a partial row; the last complete one is
+    # what we want, but guard against the file holding only the header
+    last = lines[-1].decode("utf-8", errors="replace")
+    if pos == 0 and len(lines) < 2:
+        raise ValueError("CSV is empty.")
+    return dict(zip(header, next(csv.reader([last]))))
+
+
 def latest_window_features(user_id: str | None = None) -> dict:
     """
     Loads the last row from labels/stress_30s.csv and returns ONLY the
@@ -345,12 +606,9 @@ def latest_window_features(user_id: str | None = None) -> dict:
     if not csv_path.exists():
         raise FileNotFoundError(f"No CSV found at {csv_path}")
 
-    # read only tail for speed
-    df = pd.read_csv(csv_path)
-    if len(df) == 0:
-        raise ValueError("CSV is empty.")
-
-    last = df.iloc[-1].to_dict()
+    # read only the tail for speed — the file grows without bound and a
+    # full pd.read_csv reparses every historical window each poll
+    last = _read_last_csv_row(csv_path)
 
     # pick only the trained features
     out = {}
@@ -367,14 +625,32 @@ def latest_window_features(user_id: str | None = None) -> dict:
 
 
 # ---------- Calibrator helpers ----------
+# In a fresh deployment no calibrator has ever been trained; checked once
+# at import so those installs skip the per-user lookup machinery entirely.
+_ANY_CALIBRATOR = CAL_DIR.exists() and any(CAL_DIR.glob("cal_*"))
+_UNFIT_CAL = PlattCalibrator()  # shared "no calibration" sentinel
+
 def load_user_calibrator(user_id: str) -> PlattCalibrator:
-    path = CAL_DIR / f"cal_{user_id}.json"
-    return PlattCalibrator.from_file(path)
+    if not _ANY_CALIBRATOR:
+        return _UNFIT_CAL
+    # Cached per process: the JSON (or its absence — the common case) was
+    # being stat'ed and re-parsed on every predict. The cache only changes
+    # when train_user_calibrator writes a new file.
+    # Lock-free on a hit (atomic dict.get); only a miss pays for the lock
+    # and the file load, double-checked against concurrent loaders.
+    cal = _CALIBRATORS.get(user_id)
+    if cal is None:
+        with _LOCK:
+            cal = _CALIBRATORS.get(user_id)
+            if cal is None:
+                cal = PlattCalibrator.from_file(CAL_DIR / f"cal_{user_id}.json")
+                _CALIBRATORS[user_id] = cal
+    return cal
 
 def train_user_calibrator(user_id: str = "harsh", min_rows: int = 200) -> str:
     """
     Fit a Platt calibrator mapping head scores -> binary labels from face,
-    using rows in labels/stress_30s.csv. Saves to artifacts/calibrators/cal_<user>.json.
+    using rows in labels/stress_30s.csv. Saves to artifacts/calibrators/cal_<user>.bin.
     """
     init_service()
     pred = get_predictor()
@@ -383,6 +659,10 @@ def train_user_calibrator(user_id: str = "harsh", min_rows: int = 200) -> str:
     if not csv_path.exists():
         raise FileNotFoundError(f"CSV not found at {csv_path}")
 
+    # pandas is only needed for this occasional training path; importing
+    # it lazily keeps it out of app startup and the predict hot path.
+    import pandas as pd
+
     df = pd.read_csv(csv_path)
 
     # Filter by user and quality if present
@@ -394,15 +674,21 @@ def train_user_calibrator(user_id: str = "harsh", min_rows: int = 200) -> str:
     if len(df) < min_rows:
         raise ValueError(f"Need at least {min_rows} rows for calibration; found {len(df)}.")
 
-    # Build features in the same order used at training time
-    X = df[pred.feature_names].replace([np.inf, -np.inf], np.nan).fillna(0.0).astype(np.float32).values
-    Xz = pred.scaler.transform(X)
-
-    # Head scores on these rows
-    if hasattr(pred.head, "predict_proba"):
-        scores = pred.head.predict_proba(Xz)[:, 1]
+    # Build features in the same order used at training time — one typed
+    # construction (reindex backfills absent columns with 0, so a schema
+    # drift no longer raises KeyError) plus an in-place NaN/inf scrub,
+    # instead of three full replace/fillna/astype passes over the frame.
+    X = df.reindex(columns=pred.feature_names, fill_value=0.0).to_numpy(dtype=np.float32)
+    np.nan_to_num(X, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+
+    # Head scores on these rows (fused affine when available)
+    if pred._w is not None:
+        z = X @ pred._w + pred._b
+        scores = 1.0 / (1.0 + np.exp(-z)) if pred._is_logistic else np.clip(z, 0, 1)
+    elif hasattr(pred.head, "predict_proba"):
+        scores = pred.head.predict_proba(pred.scaler.transform(X))[:, 1]
     else:
-        scores = np.clip(pred.head.predict(Xz), 0, 1)
+        scores = np.clip(pred.head.predict(pred.scaler.transform(X)), 0, 1)
 
     y = df["stress_prob"].values.astype(np.float32)
 
@@ -410,6 +696,10 @@ def train_user_calibrator(user_id: str = "harsh", min_rows: int = 200) -> str:
     cal.fit(scores, y)
 
     CAL_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = CAL_DIR / f"cal_{user_id}.json"
+    out_path = CAL_DIR / f"cal_{user_id}.bin"
     cal.save(out_path)
+    global _ANY_CALIBRATOR
+    with _LOCK:
+        _CALIBRATORS[user_id] = cal  # refresh the in-memory copy
+        _ANY_CALIBRATOR = True
     return str(out_path)
@@ -1,34 +1,64 @@
 import time
 import csv
+import queue
+import struct
 import threading
 import os
 import signal
 import psutil
 import sys
 import numpy as np
-import matplotlib.pyplot as plt
+from collections import deque
 from datetime import datetime, timedelta
 from pynput import keyboard, mouse
 from plyer import notification
 from pystray import Icon, MenuItem, Menu
 from PIL import Image, ImageDraw
-import pandas as pd
-import tkinter as tk
-from tkinter import ttk
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
 import pickle  # Added for loading the ML model
 
+# Optional: numba JIT for the per-cycle numeric kernels. The kernels
+# are written to run identically as plain Python/NumPy when numba is
+# not installed.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# matplotlib, pandas and tkinter are imported lazily inside the
+# functions that need them: together they cost over a second of import
+# time and tens of MB of RSS, and the tray can run for hours without
+# the user ever opening graphs or hitting the popup fallback.
+
 # Global State Variables
-keystrokes = []
-backspace_count = 0
-mouse_movements = []
-key_press_times = []  # Timing between key presses
-mouse_click_count = 0  # Count mouse clicks
-idle_time = 0  # Track idle time
-last_action_time = time.time()  # Track last action time
+#
+# All raw input flows through a single event queue: the pynput listener
+# threads do exactly one deque.append per event (append/popleft are
+# atomic in CPython, so no lock is taken on the hot path) and
+# monitor_behavior drains the queue once per 30-second cycle and does
+# all the math — idle accounting included — over NumPy arrays. Bounded
+# so an unattended session can't grow it without limit.
+_EV_MAX = 20000
+ev_queue = deque(maxlen=_EV_MAX)
+# Event kinds (second tuple field)
+_EV_KEY, _EV_BACKSPACE, _EV_CLICK, _EV_MOVE = 0, 1, 2, 3
+# Timestamps are time.monotonic_ns() ints: one C call per event, no
+# float rounding, and integer deltas are all the metrics ever need.
+# Seconds only appear once, when a metric divides by _NS at the end.
+_NS = 1_000_000_000
+_EV_DTYPE = np.dtype([('t', np.int64), ('kind', np.int8),
+                      ('x', np.float32), ('y', np.float32)])
+last_action_time = time.monotonic_ns()  # end of the last event seen by the monitor
 running = True
 paused = False
+# Set on shutdown: the monitor waits on this instead of sleeping, so
+# quit wakes it immediately rather than after up to 30 s
+stop_event = threading.Event()
+
+# Notifications run on their own consumer thread: plyer's backends can
+# block for hundreds of ms on DBus/toast APIs and the tkinter fallback
+# spins a mainloop, none of which should delay the metrics cycle. The
+# monitor enqueues and drops on overflow instead of waiting.
+notify_q = queue.Queue(maxsize=4)
 
 # Process management
 pid_file = "tracker_tray.pid"
@@ -38,7 +68,36 @@ model_path = "C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\rf_model_30
 scaler_path = "C:\\Users\\harsh\\OneDrive\\Desktop\\MajorProject\\ML\\scaler_30s.pkl"
 
 # Logging Setup
-log_file_path = "stress_log2.csv"
+#
+# The stress log is append-only fixed-width binary records: writing is
+# one tofile() memcpy per cycle and show_graphs reads the whole history
+# back with a single np.fromfile — no text formatting or parsing on
+# either side. Stress factors are packed into a u2 bitmask over
+# _FACTOR_LABELS instead of a comma-joined string; ml is -1 when the
+# model made no prediction.
+log_file_path = "stress_log2.bin"
+_LOG_DTYPE = np.dtype([
+    ('ts', '<f8'), ('typing_speed', '<f4'), ('br', '<f4'), ('mj', '<f4'),
+    ('kr', '<f4'), ('it', '<f4'), ('mc', '<f4'), ('score', 'i1'),
+    ('factors', '<u2'), ('ml', 'i1'),
+])
+# Same 36-byte layout as _LOG_DTYPE; packing a tuple through a
+# precompiled Struct is far cheaper than building a one-row structured
+# array per flush.
+_LOG_STRUCT = struct.Struct('<d6fbHb')
+_FACTOR_LABELS = (
+    "very slow typing", "slow typing", "unusually fast typing",
+    "high error correction", "moderate error correction",
+    "excessive mouse movement", "jittery mouse movement",
+    "erratic typing pattern", "inconsistent typing rhythm",
+    "frequent brief pauses", "excessive clicking",
+)
+
+def _factors_to_bitmask(factors):
+    return sum(1 << _FACTOR_LABELS.index(f) for f in factors)
+
+def _bitmask_to_factors(mask):
+    return [lbl for i, lbl in enumerate(_FACTOR_LABELS) if mask & (1 << i)]
 
 # Load the model and scaler
 try:
@@ -61,16 +120,12 @@ feature_columns = [
     'hour', 'day_of_week', 'daylight_morning', 'daylight_evening', 'session_active'
 ]
 
-# Create the log file if it doesn't exist
-if not os.path.exists(log_file_path):
-    with open(log_file_path, mode='w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            "timestamp", "typing_speed", "backspace_rate", "mouse_jitter", 
-            "key_rhythm_consistency", "idle_time", "mouse_click_rate", 
-            "stress_level", "stress_factors", "ml_prediction"  # Added ML prediction column
-        ])
-        
+# Keep the stress log open for the process lifetime: reopening every
+# 30 s pays open/flush syscalls per record and can race when two
+# writers open the file at once. A raw fd + os.write means each flush
+# is exactly one append syscall with no buffered-IO layer in between.
+_log_fd = os.open(log_file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
 # ML prediction log file (to track all features and predictions)
 ml_log_file_path = "ml_predictions.csv"
 if not os.path.exists(ml_log_file_path):
@@ -79,6 +134,28 @@ if not os.path.exists(ml_log_file_path):
         header = ["timestamp", "ml_prediction"] + feature_columns
         writer.writerow(header)
 
+# Same persistent-writer treatment as the stress log above
+_ml_log_fp = open(ml_log_file_path, mode='a', newline='')
+_ml_log_writer = csv.writer(_ml_log_fp)
+
+# Write coalescing: rows accumulate in memory and hit the disk every
+# _FLUSH_CYCLES cycles, or immediately when the stress score jumps by
+# two or more so the log is fresh whenever something changed. cleanup()
+# flushes whatever is still pending. Only the monitor thread touches
+# the buffers.
+_FLUSH_CYCLES = 4
+_row_buf = []
+_ml_row_buf = []
+
+def _flush_log_buffers():
+    if _row_buf:
+        os.write(_log_fd, b''.join(_LOG_STRUCT.pack(*row) for row in _row_buf))
+        _row_buf.clear()
+    if _ml_row_buf:
+        _ml_log_writer.writerows(_ml_row_buf)
+        _ml_log_fp.flush()
+        _ml_row_buf.clear()
+
 
 # Process Management
 def check_existing_process():
@@ -107,6 +184,18 @@ def check_existing_process():
 
 def cleanup():
     """Clean up resources before exiting"""
+    try:
+        _flush_log_buffers()
+    except Exception:
+        pass
+    try:
+        os.close(_log_fd)
+    except Exception:
+        pass
+    try:
+        _ml_log_fp.close()
+    except Exception:
+        pass
     if os.path.exists(pid_file):
         try:
             os.remove(pid_file)
@@ -116,57 +205,169 @@ def cleanup():
 # -----------------------
 # Helper Functions
 # -----------------------
-def calculate_typing_speed():
-    """Calculate typing speed in keystrokes per second"""
-    if len(keystrokes) < 2:
-        return 0
-    intervals = [t2 - t1 for t1, t2 in zip(keystrokes, keystrokes[1:]) if t2 - t1 < 5]
-    return round(len(intervals) / (sum(intervals) + 1e-5), 2) if intervals else 0
-
-def calculate_backspace_rate():
-    """Calculate the rate of backspace usage"""
-    total_keys = len(keystrokes)
-    return round(backspace_count / total_keys, 2) if total_keys > 0 else 0
-
-def calculate_mouse_jitter():
-    """Calculate mouse movement instability"""
-    if len(mouse_movements) < 2:
-        return 0
-    dist = 0
-    for (x1, y1), (x2, y2) in zip(mouse_movements, mouse_movements[1:]):
-        dist += ((x2 - x1)**2 + (y2 - y1)**2) ** 0.5
-    return round(dist / len(mouse_movements), 2)
-
-def calculate_key_rhythm_consistency():
-    """Calculate consistency in typing rhythm"""
-    if len(key_press_times) < 3:
-        return 1.0  # Default value (consistent)
-    
-    # Calculate variance in key press intervals
-    intervals = [t2 - t1 for t1, t2 in zip(key_press_times, key_press_times[1:])]
-    if not intervals:
-        return 1.0
-    
-    # Calculate coefficient of variation (normalized measure of dispersion)
-    mean_interval = sum(intervals) / len(intervals)
-    if mean_interval == 0:
-        return 0.0
-    
-    std_dev = (sum((x - mean_interval) ** 2 for x in intervals) / len(intervals)) ** 0.5
-    coef_variation = std_dev / mean_interval
-    
-    # Normalize to 0-1 where 1 is very consistent (low variation) and 0 is inconsistent
-    consistency = max(0, min(1, 1 - (coef_variation / 2)))
-    return round(consistency, 2)
+# Persistent drain target, grown geometrically on the rare cycle that
+# overflows it: steady state allocates nothing per cycle.
+_drain_buf = np.empty(1024, dtype=_EV_DTYPE)
 
-def calculate_mouse_click_rate():
-    """Calculate mouse click frequency"""
-    total_time = 30  # 30 seconds monitoring period
-    return round(mouse_click_count / total_time, 2)
+def _drain_events():
+    """Pop everything currently queued into a structured array.
 
-def calculate_idle_time():
-    """Calculate idle time in seconds"""
-    return round(idle_time, 1)
+    Fields: t (int64 ns), kind, x, y (x/y are zero for keyboard events).
+    Events appended while we drain are simply picked up next cycle. The
+    returned array is a view into the reused module-level buffer and is
+    only valid until the next drain.
+    """
+    global _drain_buf
+    events = []
+    try:
+        while True:
+            events.append(ev_queue.popleft())
+    except IndexError:
+        pass
+    n = len(events)
+    if n > _drain_buf.size:
+        size = _drain_buf.size
+        while size < n:
+            size *= 2
+        _drain_buf = np.empty(size, dtype=_EV_DTYPE)
+    buf = _drain_buf[:n]
+    if n:
+        buf[:] = events
+    return buf
+
+def _metrics_kernel(event_times, key_times, backspaces, mx, my, last_action):
+    """Fused numeric kernel for the per-cycle metrics.
+
+    The interval array is built exactly once (manual a[1:] - a[:-1];
+    np.diff is not numba-supported) and feeds typing speed, rhythm
+    consistency and the average keypress duration; the mouse deltas
+    feed jitter — each datum is touched once instead of being
+    re-traversed by a helper per metric. No Python objects inside so
+    numba can compile it in nopython mode; rounding happens in the
+    wrapper.
+
+    Returns (typing_speed, backspace_rate, mouse_jitter, key_rhythm,
+    idle, avg_keypress_duration, new_last_action).
+    """
+    n_keys = key_times.size
+    typing_speed = 0.0
+    key_rhythm = 1.0  # default: consistent
+    avg_keypress_dur = 0.0
+    if n_keys >= 2:
+        intervals = (key_times[1:] - key_times[:-1]).astype(np.float64)
+        mean_interval = intervals.mean()
+        avg_keypress_dur = mean_interval / 1e9
+        active = intervals[intervals < 5e9]
+        if active.size:
+            typing_speed = active.size / (active.sum() / 1e9 + 1e-5)
+        if n_keys >= 3:
+            # Coefficient of variation, normalized so 1 is very
+            # consistent (low variation) and 0 is inconsistent
+            if mean_interval == 0:
+                key_rhythm = 0.0
+            else:
+                coef_variation = intervals.std() / mean_interval
+                key_rhythm = max(0.0, min(1.0, 1.0 - coef_variation / 2.0))
+
+    backspace_rate = backspaces / n_keys if n_keys > 0 else 0.0
+
+    # Mouse movement instability
+    mouse_jitter = 0.0
+    if mx.size >= 2:
+        dist = np.hypot(mx[1:] - mx[:-1], my[1:] - my[:-1]).sum()
+        mouse_jitter = dist / mx.size
+
+    # Idle ns: sum of inter-event gaps over one second, seeded with the
+    # previous cycle's last event so the gap that straddles the cycle
+    # boundary counts toward the cycle in which activity resumed
+    idle = 0.0
+    if event_times.size:
+        prev = last_action
+        total = 0
+        for i in range(event_times.size):
+            gap = event_times[i] - prev
+            if gap > 1_000_000_000:
+                total += gap
+            prev = event_times[i]
+        last_action = event_times[-1]
+        idle = total / 1e9
+
+    return (typing_speed, backspace_rate, mouse_jitter, key_rhythm,
+            idle, avg_keypress_dur, last_action)
+
+if njit is not None:
+    _metrics_kernel = njit(cache=True)(_metrics_kernel)
+
+def _compute_metrics(event_times, key_times, backspaces, clicks, mx, my):
+    """Thin wrapper over _metrics_kernel: threads the idle seed through
+    the last_action_time global and applies the log's rounding.
+
+    Returns (typing_speed, backspace_rate, mouse_jitter, key_rhythm,
+    idle_time, mouse_click_rate, avg_keypress_duration).
+    """
+    global last_action_time
+    ts, br, mj, kr, idle, avg_dur, last_action_time = _metrics_kernel(
+        event_times, key_times, backspaces, mx, my, last_action_time
+    )
+    click_rate = round(clicks / 30, 2)  # 30-second monitoring period
+    return (round(ts, 2), round(br, 2), round(mj, 2), round(kr, 2),
+            round(idle, 1), click_rate, avg_dur)
+
+# Table-driven stress scoring: per metric, ascending bucket boundaries
+# plus a score and a _FACTOR_LABELS index (-1 = no factor) for each
+# bucket. searchsorted(..., side='right') picks the bucket; the old
+# chain's strict ">" comparisons are encoded by nudging the boundary up
+# one ULP with np.nextafter so every edge case classifies identically.
+# Editing a threshold is now a data change, not a branch rewrite.
+_STRESS_RULES = (
+    # typing speed: <0.5 very slow (+2), <1.2 slow (+1), >4 fast (+1)
+    ('typing_speed', np.array([0.5, 1.2, np.nextafter(4, np.inf)]),
+     (2, 1, 0, 1), (0, 1, -1, 2)),
+    # backspace rate: >0.3 high correction (+2), >0.15 moderate (+1)
+    ('backspace_rate', np.array([np.nextafter(0.15, np.inf), np.nextafter(0.3, np.inf)]),
+     (0, 1, 2), (-1, 4, 3)),
+    # mouse jitter: >1000 excessive (+2), >600 jittery (+1)
+    ('mouse_jitter', np.array([np.nextafter(600, np.inf), np.nextafter(1000, np.inf)]),
+     (0, 1, 2), (-1, 6, 5)),
+    # rhythm consistency: <0.4 erratic (+2), <0.6 inconsistent (+1)
+    ('key_rhythm', np.array([0.4, 0.6]), (2, 1, 0), (7, 8, -1)),
+    # idle time: 3 < it < 10 frequent brief pauses (+1)
+    ('idle_time', np.array([np.nextafter(3, np.inf), 10.0]), (0, 1, 0), (-1, 9, -1)),
+    # mouse clicks: >2 excessive clicking (+1)
+    ('mouse_clicks', np.array([np.nextafter(2, np.inf)]), (0, 1), (-1, 10)),
+)
+
+# Flat views of the rule table for the scoring kernel: all boundaries
+# concatenated with per-metric offsets, and per-bucket scores/factor
+# bits laid out in rule order.
+_RULE_BOUNDS = np.concatenate([r[1] for r in _STRESS_RULES])
+_RULE_OFFSETS = np.concatenate(
+    ([0], np.cumsum([r[1].size for r in _STRESS_RULES]))).astype(np.int64)
+_RULE_SCORES = np.array([s for r in _STRESS_RULES for s in r[2]], np.int64)
+_RULE_BITS = np.array([b for r in _STRESS_RULES for b in r[3]], np.int64)
+
+def _score_kernel(values, bounds, offsets, scores, bits):
+    """Score all metrics against the flattened rule table.
+
+    Returns (raw score, factor bitmask); factor names are resolved
+    outside the kernel so nothing here touches Python objects.
+    """
+    score = 0
+    mask = 0
+    base = 0
+    for i in range(values.shape[0]):
+        lo = offsets[i]
+        hi = offsets[i + 1]
+        bucket = np.searchsorted(bounds[lo:hi], values[i], side='right')
+        score += scores[base + bucket]
+        bit = bits[base + bucket]
+        if bit >= 0:
+            mask |= 1 << bit
+        base += hi - lo + 1
+    return score, mask
+
+if njit is not None:
+    _score_kernel = njit(cache=True)(_score_kernel)
 
 def detect_stress(metrics):
     """
@@ -177,64 +378,18 @@ def detect_stress(metrics):
     4-6: Moderate stress
     7-10: High stress
     """
-    ts = metrics['typing_speed']
-    br = metrics['backspace_rate']
-    mj = metrics['mouse_jitter']
-    kr = metrics['key_rhythm']
-    it = metrics['idle_time']
-    mc = metrics['mouse_clicks']
-    
-    stress_score = 0
-    factors = []
-    
-    # Typing speed analysis
-    if ts < 0.5:
-        stress_score += 2
-        factors.append("very slow typing")
-    elif ts < 1.2:
-        stress_score += 1
-        factors.append("slow typing")
-    elif ts > 4:
-        stress_score += 1
-        factors.append("unusually fast typing")
-    
-    # Backspace rate analysis
-    if br > 0.3:
-        stress_score += 2
-        factors.append("high error correction")
-    elif br > 0.15:
-        stress_score += 1
-        factors.append("moderate error correction")
-    
-    # Mouse jitter analysis
-    if mj > 1000:
-        stress_score += 2
-        factors.append("excessive mouse movement")
-    elif mj > 600:
-        stress_score += 1
-        factors.append("jittery mouse movement")
-    
-    # Typing rhythm consistency
-    if kr < 0.4:
-        stress_score += 2
-        factors.append("erratic typing pattern")
-    elif kr < 0.6:
-        stress_score += 1
-        factors.append("inconsistent typing rhythm")
-    
-    # Idle time analysis (frequent short pauses may indicate stress)
-    if 3 < it < 10:
-        stress_score += 1
-        factors.append("frequent brief pauses")
-    
-    # Mouse click analysis
-    if mc > 2:
-        stress_score += 1
-        factors.append("excessive clicking")
-    
+    values = np.array([metrics[key] for key, _, _, _ in _STRESS_RULES],
+                      dtype=np.float64)
+    stress_score, mask = _score_kernel(
+        values, _RULE_BOUNDS, _RULE_OFFSETS, _RULE_SCORES, _RULE_BITS
+    )
+    # Bit order matches rule order, so the factor list reads the same
+    # as the old append-per-branch version
+    factors = _bitmask_to_factors(int(mask))
+
     # Cap the stress score at 10
-    stress_score = min(stress_score, 10)
-    
+    stress_score = min(int(stress_score), 10)
+
     # Determine stress level category
     if stress_score <= 3:
         level = "CALM"
@@ -242,7 +397,7 @@ def detect_stress(metrics):
         level = "MODERATE STRESS"
     else:
         level = "HIGH STRESS"
-    
+
     return (level, stress_score, factors)
 
 def predict_stress_with_ml(data):
@@ -254,6 +409,8 @@ def predict_stress_with_ml(data):
         return None  # Return None if model failed to load
     
     try:
+        import pandas as pd
+
         # Create a DataFrame with the expected features
         features_df = pd.DataFrame([data], columns=feature_columns)
         
@@ -272,35 +429,24 @@ def predict_stress_with_ml(data):
         print(f"Error making prediction: {e}")
         return None
 
-def collect_features_for_ml():
+def collect_features_for_ml(keypresses, avg_keypress_dur, backspaces,
+                            click_count, mouse_move_count, jitter):
     """
     Collect and format features for the ML model.
     These must match the feature columns the model was trained on.
+    The numeric inputs come from the fused _compute_metrics pass.
     """
     # Get the current time
     now = datetime.now()
-    
-    # Calculate metrics for ML prediction
-    avg_keypress_dur = 0
-    if len(key_press_times) >= 2:
-        intervals = [t2 - t1 for t1, t2 in zip(key_press_times, key_press_times[1:])]
-        if intervals:
-            avg_keypress_dur = sum(intervals) / len(intervals)
-    
-    # Count keypresses
-    keypresses = len(keystrokes)
-    
+
     # Error rate (backspace / total keypresses)
-    error_rate = backspace_count / keypresses if keypresses > 0 else 0
-    
+    error_rate = backspaces / keypresses if keypresses > 0 else 0
+
     # Average mouse speed
-    avg_mouse_speed = calculate_mouse_jitter()  # Using jitter as a proxy for speed
-    
-    # Mouse movement count
-    mouse_move_count = len(mouse_movements)
-    
+    avg_mouse_speed = jitter  # Using jitter as a proxy for speed
+
     # Check if session is active (any keyboard or mouse activity)
-    session_active = 1 if keypresses > 0 or mouse_move_count > 0 or mouse_click_count > 0 else 0
+    session_active = 1 if keypresses > 0 or mouse_move_count > 0 or click_count > 0 else 0
     
     # Time features
     hour = now.hour
@@ -314,11 +460,11 @@ def collect_features_for_ml():
     features = {
         'avg_keypress_duration': avg_keypress_dur,
         'keypress_count': keypresses,
-        'backspace_count': backspace_count,
+        'backspace_count': backspaces,
         'error_rate': error_rate,
         'avg_mouse_speed': avg_mouse_speed,
         'mouse_move_count': mouse_move_count,
-        'mouse_click_count': mouse_click_count,
+        'mouse_click_count': click_count,
         'hour': hour,
         'day_of_week': day_of_week,
         'daylight_morning': daylight_morning,
@@ -328,6 +474,12 @@ def collect_features_for_ml():
     
     return features
 
+def _notification_worker():
+    """Drain notify_q forever, delivering one notification at a time"""
+    while True:
+        status, score, reasons, ml_prediction = notify_q.get()
+        show_popup(status, score, reasons, ml_prediction)
+
 def show_popup(status, score, reasons, ml_prediction=None):
     """Display a notification with stress status"""
     if not reasons:
@@ -360,6 +512,9 @@ def show_popup(status, score, reasons, ml_prediction=None):
 def show_tkinter_popup(title, message):
     """Fallback notification using Tkinter"""
     try:
+        import tkinter as tk
+        from tkinter import ttk
+
         popup = tk.Tk()
         popup.title(title)
         popup.attributes("-topmost", True)
@@ -382,75 +537,72 @@ def show_tkinter_popup(title, message):
 
 
 # Event Handlers
+#
+# These run on pynput's listener threads: the only work done here is a
+# single atomic deque.append, so the GIL is held for as short a time as
+# possible and typing/mouse latency is unaffected by the monitor thread.
+
+# Key.backspace is a singleton enum member, so a prebound identity test
+# skips the attribute walk and __eq__ dispatch on every keystroke
+_BACKSPACE = keyboard.Key.backspace
+
 def on_press(key):
     if paused or not running:
         return
-    
-    global backspace_count, last_action_time, idle_time
-    
-    # Update idle time
-    current_time = time.time()
-    if last_action_time:
-        idle_duration = current_time - last_action_time
-        if idle_duration > 1:  # Only count idle periods > 1 second
-            idle_time += idle_duration
-    
-    last_action_time = current_time
-    keystrokes.append(current_time)
-    key_press_times.append(current_time)
-    
-    if key == keyboard.Key.backspace:
-        backspace_count += 1
+    kind = _EV_BACKSPACE if key is _BACKSPACE else _EV_KEY
+    ev_queue.append((time.monotonic_ns(), kind, 0.0, 0.0))
 
 def on_click(x, y, button, pressed):
     if paused or not running:
         return
-    
-    global mouse_click_count, last_action_time, idle_time
-    
     if pressed:
-        # Update idle time
-        current_time = time.time()
-        if last_action_time:
-            idle_duration = current_time - last_action_time
-            if idle_duration > 1:
-                idle_time += idle_duration
-        
-        last_action_time = current_time
-        mouse_click_count += 1
+        ev_queue.append((time.monotonic_ns(), _EV_CLICK, x, y))
 
 def on_move(x, y):
     if paused or not running:
         return
-    
-    global last_action_time, idle_time
-    
-    # Update idle time
-    current_time = time.time()
-    if last_action_time:
-        idle_duration = current_time - last_action_time
-        if idle_duration > 1:
-            idle_time += idle_duration
-    
-    last_action_time = current_time
-    mouse_movements.append((x, y))
-    if len(mouse_movements) > 100:
-        mouse_movements.pop(0)
+    ev_queue.append((time.monotonic_ns(), _EV_MOVE, x, y))
+
+def _start_listeners():
+    """(Re)create and start the pynput listeners.
+
+    pynput listener threads cannot be restarted once stopped, so pause/
+    resume builds fresh ones.
+    """
+    global keyboard_listener, mouse_listener
+    keyboard_listener = keyboard.Listener(on_press=on_press)
+    mouse_listener = mouse.Listener(on_move=on_move, on_click=on_click)
+    keyboard_listener.start()
+    mouse_listener.start()
 
 
 # Main Tracking Logic
 def monitor_behavior():
+    prev_status = None
+    prev_score = 0
+    cycles_since_flush = 0
     while running:
         if not paused and running:
             try:
-                # Calculate metrics
-                ts = calculate_typing_speed()
-                br = calculate_backspace_rate()
-                mj = calculate_mouse_jitter()
-                kr = calculate_key_rhythm_consistency()
-                it = calculate_idle_time()
-                mc = calculate_mouse_click_rate()
-                
+                # Drain everything queued since the last cycle and split
+                # it into per-kind columns; draining doubles as the reset
+                ev = _drain_events()
+                t_col = ev['t']
+                kind = ev['kind']
+                key_times = t_col[kind <= _EV_BACKSPACE]
+                backspaces = int((kind == _EV_BACKSPACE).sum())
+                clicks = int((kind == _EV_CLICK).sum())
+                move_mask = kind == _EV_MOVE
+                mx, my = ev['x'][move_mask], ev['y'][move_mask]
+
+                ts, br, mj, kr, it, mc, avg_dur = _compute_metrics(
+                    t_col, key_times, backspaces, clicks, mx, my
+                )
+                ml_features = collect_features_for_ml(
+                    int(key_times.size), avg_dur, backspaces, clicks,
+                    int(mx.size), mj
+                )
+
                 # Package metrics for stress detection
                 metrics = {
                     'typing_speed': ts,
@@ -463,72 +615,76 @@ def monitor_behavior():
                 
                 # Detect stress using rule-based method
                 status, score, factors = detect_stress(metrics)
-                
-                # Collect features for ML prediction
-                ml_features = collect_features_for_ml()
-                
+
                 # Make ML prediction if model is loaded
                 ml_prediction = predict_stress_with_ml(ml_features) if model_loaded else None
                 
-                # Show notification with both rule-based and ML results
-                show_popup(status, score, factors, ml_prediction)
+                # Notify only when the status actually changes — a toast
+                # every 30 s repeating the same state is just spam. The
+                # worker thread does the actual (possibly blocking) call.
+                if status != prev_status:
+                    try:
+                        notify_q.put_nowait((status, score, factors, ml_prediction))
+                    except queue.Full:
+                        pass  # backlogged notifier: drop rather than stall
+                prev_status = status
 
                 # Current timestamp
                 timestamp = time.time()
-                
-                # Log data to the main log file
-                with open(log_file_path, mode='a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        timestamp, ts, br, mj, kr, it, mc, score, 
-                        ','.join(factors) if factors else "none",
-                        int(ml_prediction) if ml_prediction is not None else "N/A"
-                    ])
-                
-                # Log data to the ML-specific log file
+
+                # Buffer one fixed-width record for the main log file
+                _row_buf.append((
+                    timestamp, ts, br, mj, kr, it, mc, score,
+                    _factors_to_bitmask(factors),
+                    int(ml_prediction) if ml_prediction is not None else -1
+                ))
+
+                # Buffer a row for the ML-specific log file
                 if model_loaded:
-                    with open(ml_log_file_path, mode='a', newline='') as f:
-                        writer = csv.writer(f)
-                        ml_data = [timestamp, int(ml_prediction)]
-                        for feature in feature_columns:
-                            ml_data.append(ml_features[feature])
-                        writer.writerow(ml_data)
-
-                # Reset counters
-                keystrokes.clear()
-                key_press_times.clear()
-                mouse_movements.clear()
-                global backspace_count, mouse_click_count, idle_time
-                backspace_count = 0
-                mouse_click_count = 0
-                idle_time = 0
-                
+                    ml_data = [timestamp, int(ml_prediction)]
+                    for feature in feature_columns:
+                        ml_data.append(ml_features[feature])
+                    _ml_row_buf.append(ml_data)
+
+                # Coalesced flush: every few cycles, or right away when
+                # the score jumps so the on-disk log stays current
+                cycles_since_flush += 1
+                if cycles_since_flush >= _FLUSH_CYCLES or score >= prev_score + 2:
+                    _flush_log_buffers()
+                    cycles_since_flush = 0
+                prev_score = score
+
             except Exception as e:
                 print(f"Error in monitor thread: {e}")
 
-        time.sleep(30)  # Take measurements every 30 seconds
-        
-        # Break the loop if not running
-        if not running:
+        # Take measurements every 30 seconds; wait() returns True the
+        # moment stop_event is set, making shutdown immediate
+        if stop_event.wait(30):
             break
 
 # Data Visualization
 def show_graphs():
     """Display graphs of tracked metrics"""
     try:
+        import tkinter as tk
+        from tkinter import ttk
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
         # Load data from CSV
         if not os.path.exists(log_file_path) or os.path.getsize(log_file_path) == 0:
             show_popup("No Data", "No tracking data available yet.", [])
             return
         
-        df = pd.read_csv(log_file_path)
-        if len(df) < 2:
+        # Fixed-width records read back in one memcpy — no text parsing
+        rec = np.fromfile(log_file_path, dtype=_LOG_DTYPE)
+        if rec.shape[0] < 2:
             show_popup("Insufficient Data", "Need more data points for visualization.", [])
             return
-        
-        # Convert timestamp to datetime for better x-axis
-        df['datetime'] = pd.to_datetime(df['timestamp'], unit='s')
-        
+
+        # Convert timestamp to datetime64 for better x-axis
+        times = rec['ts'].astype(np.int64).astype('datetime64[s]')
+
         # Create visualization window
         root = tk.Tk()
         root.title("Stress Tracking Metrics")
@@ -544,17 +700,24 @@ def show_graphs():
         
         fig1 = Figure(figsize=(10, 6))
         ax1 = fig1.add_subplot(111)
-        ax1.plot(df['datetime'], df['stress_level'], 'r-', linewidth=2, label='Rule-Based')
-        
-        # Plot ML predictions if available
-        if 'ml_prediction' in df.columns and df['ml_prediction'].dtype != object:
-            ml_data = df[df['ml_prediction'].notna()]
-            if not ml_data.empty:
-                # Convert binary predictions to a stress scale (0 to 10) for visualization
-                ml_data['ml_stress_scale'] = ml_data['ml_prediction'] * 10
-                ax1.plot(ml_data['datetime'], ml_data['ml_stress_scale'], 'b--', linewidth=1.5, 
-                         label='ML Prediction (scaled)')
-        
+        ax1.plot(times, rec['score'], 'r-', linewidth=2, label='Rule-Based')
+
+        # Plot ML predictions if available (the ML log is all-numeric)
+        ml_times = ml_preds = None
+        if os.path.exists(ml_log_file_path) and os.path.getsize(ml_log_file_path) > 0:
+            try:
+                ml = np.loadtxt(ml_log_file_path, delimiter=',', skiprows=1,
+                                usecols=(0, 1), ndmin=2)
+                if ml.shape[0] > 0:
+                    ml_times = ml[:, 0].astype(np.int64).astype('datetime64[s]')
+                    ml_preds = ml[:, 1]
+            except Exception as e:
+                print(f"Error reading ML predictions log: {e}")
+        if ml_preds is not None:
+            # Convert binary predictions to a stress scale (0 to 10) for visualization
+            ax1.plot(ml_times, ml_preds * 10, 'b--', linewidth=1.5,
+                     label='ML Prediction (scaled)')
+
         ax1.set_title('Stress Level Over Time')
         ax1.set_xlabel('Time')
         ax1.set_ylabel('Stress Level (0-10)')
@@ -564,9 +727,9 @@ def show_graphs():
         # Add a horizontal line at moderate stress threshold
         ax1.axhline(y=4, color='orange', linestyle='--', alpha=0.7)
         ax1.axhline(y=7, color='red', linestyle='--', alpha=0.7)
-        ax1.text(df['datetime'].iloc[0], 3.5, 'Calm', color='green', fontsize=10)
-        ax1.text(df['datetime'].iloc[0], 5.5, 'Moderate', color='orange', fontsize=10)
-        ax1.text(df['datetime'].iloc[0], 8.5, 'High Stress', color='red', fontsize=10)
+        ax1.text(times[0], 3.5, 'Calm', color='green', fontsize=10)
+        ax1.text(times[0], 5.5, 'Moderate', color='orange', fontsize=10)
+        ax1.text(times[0], 8.5, 'High Stress', color='red', fontsize=10)
         
         canvas1 = FigureCanvasTkAgg(fig1, tab1)
         canvas1.draw()
@@ -578,9 +741,9 @@ def show_graphs():
         
         fig2 = Figure(figsize=(10, 6))
         ax2 = fig2.add_subplot(111)
-        ax2.plot(df['datetime'], df['typing_speed'], 'b-', label='Typing Speed')
-        ax2.plot(df['datetime'], df['backspace_rate'], 'r-', label='Backspace Rate')
-        ax2.plot(df['datetime'], df['key_rhythm_consistency'], 'g-', label='Rhythm Consistency')
+        ax2.plot(times, rec['typing_speed'], 'b-', label='Typing Speed')
+        ax2.plot(times, rec['br'], 'r-', label='Backspace Rate')
+        ax2.plot(times, rec['kr'], 'g-', label='Rhythm Consistency')
         ax2.set_title('Typing Metrics Over Time')
         ax2.set_xlabel('Time')
         ax2.set_ylabel('Value')
@@ -597,8 +760,8 @@ def show_graphs():
         
         fig3 = Figure(figsize=(10, 6))
         ax3 = fig3.add_subplot(111)
-        ax3.plot(df['datetime'], df['mouse_jitter'], 'b-', label='Mouse Jitter')
-        ax3.plot(df['datetime'], df['mouse_click_rate'], 'r-', label='Click Rate')
+        ax3.plot(times, rec['mj'], 'b-', label='Mouse Jitter')
+        ax3.plot(times, rec['mc'], 'r-', label='Click Rate')
         ax3.set_title('Mouse Activity Over Time')
         ax3.set_xlabel('Time')
         ax3.set_ylabel('Value')
@@ -613,26 +776,22 @@ def show_graphs():
         tab4 = ttk.Frame(notebook)
         notebook.add(tab4, text="Recent Stress Factors")
         
-        # Get the most recent factors
-        recent_data = df.tail(10).copy()
-        recent_data['factors'] = recent_data['stress_factors'].fillna('none')
-        
         # Create a text widget to show recent stress factors
         factor_text = tk.Text(tab4, wrap=tk.WORD, height=20, width=80)
         factor_text.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
-        
+
         factor_text.insert(tk.END, "Recent Stress Factors:\n\n")
-        for idx, row in recent_data.iterrows():
-            timestamp = row['datetime'].strftime('%Y-%m-%d %H:%M:%S')
-            level = row['stress_level']
-            factors = row['factors']
-            ml_pred = row.get('ml_prediction', 'N/A')
-            
+        for row in rec[-10:]:
+            timestamp = datetime.fromtimestamp(float(row['ts'])).strftime('%Y-%m-%d %H:%M:%S')
+            level = int(row['score'])
+            factors = ', '.join(_bitmask_to_factors(int(row['factors']))) or 'none'
+            ml_pred = int(row['ml'])
+
             factor_text.insert(tk.END, f"Time: {timestamp}\n")
             factor_text.insert(tk.END, f"Stress Level: {level}/10\n")
             
-            # Add ML prediction if available
-            if ml_pred != 'N/A':
+            # Add ML prediction if available (-1 means no prediction)
+            if ml_pred >= 0:
                 ml_status = "STRESSED" if ml_pred == 1 else "NOT STRESSED"
                 factor_text.insert(tk.END, f"ML Prediction: {ml_status}\n")
                 
@@ -651,38 +810,31 @@ def show_graphs():
         
         factor_text.config(state=tk.DISABLED)
         
-        # If ML log file exists, add a tab for ML predictions
-        if os.path.exists(ml_log_file_path) and os.path.getsize(ml_log_file_path) > 0:
-            try:
-                ml_df = pd.read_csv(ml_log_file_path)
-                if len(ml_df) > 0:
-                    # Tab 5: ML Predictions
-                    tab5 = ttk.Frame(notebook)
-                    notebook.add(tab5, text="ML Predictions")
-                    
-                    # Convert timestamp to datetime
-                    ml_df['datetime'] = pd.to_datetime(ml_df['timestamp'], unit='s')
-                    
-                    fig5 = Figure(figsize=(10, 6))
-                    ax5 = fig5.add_subplot(111)
-                    
-                    # Plot the predictions (0 or 1) as points
-                    ax5.plot(ml_df['datetime'], ml_df['ml_prediction'], 'bo-', markersize=6)
-                    
-                    # Set y-axis limits and ticks for binary predictions
-                    ax5.set_ylim(-0.1, 1.1)
-                    ax5.set_yticks([0, 1])
-                    ax5.set_yticklabels(['Not Stressed', 'Stressed'])
-                    
-                    ax5.set_title('ML Stress Predictions Over Time')
-                    ax5.set_xlabel('Time')
-                    ax5.grid(True)
-                    
-                    canvas5 = FigureCanvasTkAgg(fig5, tab5)
-                    canvas5.draw()
-                    canvas5.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            except Exception as e:
-                print(f"Error creating ML predictions tab: {e}")
+        # If the ML log had rows, add a tab for ML predictions (arrays
+        # already loaded for the tab-1 overlay)
+        if ml_preds is not None:
+            # Tab 5: ML Predictions
+            tab5 = ttk.Frame(notebook)
+            notebook.add(tab5, text="ML Predictions")
+
+            fig5 = Figure(figsize=(10, 6))
+            ax5 = fig5.add_subplot(111)
+
+            # Plot the predictions (0 or 1) as points
+            ax5.plot(ml_times, ml_preds, 'bo-', markersize=6)
+
+            # Set y-axis limits and ticks for binary predictions
+            ax5.set_ylim(-0.1, 1.1)
+            ax5.set_yticks([0, 1])
+            ax5.set_yticklabels(['Not Stressed', 'Stressed'])
+
+            ax5.set_title('ML Stress Predictions Over Time')
+            ax5.set_xlabel('Time')
+            ax5.grid(True)
+
+            canvas5 = FigureCanvasTkAgg(fig5, tab5)
+            canvas5.draw()
+            canvas5.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
         # Add a close button at the bottom
         close_btn = ttk.Button(root, text="Close", command=root.destroy)
@@ -707,6 +859,7 @@ def exit_application(icon):
     """Properly exit the application"""
     global running
     running = False
+    stop_event.set()  # wake the monitor out of its 30-s wait
     icon.stop()
     
     # Stop listeners and other threads
@@ -726,12 +879,22 @@ def on_quit(icon, item):
 def on_pause(icon, item):
     """Handle pause menu selection"""
     global paused
+    if paused:
+        return
     paused = True
+    # Unhook the OS-level listeners entirely: while paused there is no
+    # per-event callback at all, not even a flag test
+    keyboard_listener.stop()
+    mouse_listener.stop()
     show_popup("Paused", 0, ["Tracking paused from tray"])
 
 def on_resume(icon, item):
     """Handle resume menu selection"""
-    global paused
+    global paused, last_action_time
+    if not paused:
+        return
+    _start_listeners()
+    last_action_time = time.monotonic_ns()  # don't count the pause as idle
     paused = False
     show_popup("Resumed", 0, ["Tracking resumed"])
 
@@ -753,15 +916,16 @@ if __name__ == '__main__':
     signal.signal(signal.SIGTERM, lambda sig, frame: cleanup())
     
     # Start listeners
-    keyboard_listener = keyboard.Listener(on_press=on_press)
-    mouse_listener = mouse.Listener(on_move=on_move, on_click=on_click)
-    keyboard_listener.start()
-    mouse_listener.start()
+    _start_listeners()
 
     # Start tracking thread
     tracking_thread = threading.Thread(target=monitor_behavior, daemon=True)
     tracking_thread.start()
 
+    # Start notification consumer thread
+    notify_thread = threading.Thread(target=_notification_worker, daemon=True)
+    notify_thread.start()
+
     # Create and run tray icon
     tray_icon = Icon("StressTracker")
     tray_icon.icon = create_image()